@@ -0,0 +1,154 @@
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Nothing heavy is imported at module level: the child processes below time
+# the pages' own imports and must start cold
+REPO_DIR = Path(__file__).resolve().parent.parent
+PAGES = ["main.py", "map.py"]
+BASELINE = REPO_DIR / "benchmarks" / "baseline.json"
+# A metric regresses when it exceeds TOLERANCE x its baseline plus SLACK_S;
+# the slack keeps near-zero timings from failing on noise
+TOLERANCE = 1.5
+SLACK_S = 0.05
+
+
+def time_imports(page: str):
+    # Cold cost of the page's module-level imports only, as a fresh
+    # interpreter would pay it with streamlit already loaded
+    import streamlit  # noqa: F401
+
+    tree = ast.parse((REPO_DIR / page).read_text())
+    imports = []
+    for node in tree.body:  # the leading import block, not deferred imports
+        if not isinstance(node, (ast.Import, ast.ImportFrom)):
+            break
+        imports.append(node)
+    code = compile(ast.Module(imports, type_ignores=[]), page, "exec")
+    start = time.perf_counter()
+    exec(code, {})
+    return {"import_s": time.perf_counter() - start}
+
+
+def time_first_run(page: str):
+    # A cold first run: first_render_s is when the page title is drawn,
+    # total_s is when the script has finished
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    title = st.title
+    first_render = []
+
+    def timed_title(*args, **kwargs):
+        first_render.append(time.perf_counter())
+        return title(*args, **kwargs)
+
+    st.title = timed_title
+    app = AppTest.from_file(str(REPO_DIR / page), default_timeout=600)
+    start = time.perf_counter()
+    app.run()
+    total = time.perf_counter() - start
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+    return {"first_render_s": first_render[0] - start, "total_s": total}
+
+
+def run_child(page: str, measure: str, workdir: Path):
+    # Every measurement gets its own interpreter so nothing is warm
+    env = {**os.environ, "PYTHONPATH": str(REPO_DIR)}
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child", measure, page],
+        cwd=workdir,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_pages(rows: int, repeat: int):
+    from benchmarks.synthetic import write_synthetic_store
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        write_synthetic_store(Path(workdir), rows)
+        for page in PAGES:
+            runs = [
+                {
+                    **run_child(page, "imports", workdir),
+                    **run_child(page, "first_run", workdir),
+                }
+                for _ in range(repeat)
+            ]
+            # Best of the repeats, to keep noise out of the comparison
+            results[page] = {
+                metric: round(min(run[metric] for run in runs), 3) for metric in runs[0]
+            }
+    return results
+
+
+def compare(
+    results: dict,
+    baseline: dict,
+    tolerance: float = TOLERANCE,
+    slack: float = SLACK_S,
+):
+    # results and baseline are {group: {name: seconds}}
+    regressions = []
+    for group, timings in results.items():
+        for name, value in timings.items():
+            expected = baseline.get(group, {}).get(name)
+            if expected is not None and value > expected * tolerance + slack:
+                regressions.append(
+                    f"{group} {name}: {value:.3f}s vs baseline {expected:.3f}s"
+                )
+    return regressions
+
+
+def main(argv: list | None = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.startup",
+        description="Import-time and first-render timings for the Streamlit pages.",
+    )
+    parser.add_argument(
+        "--rows", type=int, default=200_000, help="synthetic store size"
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--save", action="store_true", help="record as the new baseline"
+    )
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        measure, page = args.child
+        timings = time_imports(page) if measure == "imports" else time_first_run(page)
+        print(json.dumps(timings))
+        return 0
+
+    results = measure_pages(args.rows, args.repeat)
+    for page, metrics in results.items():
+        print(
+            page,
+            " ".join(f"{metric}={value:.3f}s" for metric, value in metrics.items()),
+        )
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+    if args.save:
+        baseline["startup"] = results
+        BASELINE.write_text(json.dumps(baseline, indent=2) + "\n")
+        return 0
+    regressions = compare(results, baseline.get("startup", {}))
+    for regression in regressions:
+        print("REGRESSION", regression)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+import argparse
+import ast
+import gc
+import json
+import sys
+import time
+import pandas as pd
+from datetime import datetime, timedelta
+from pathlib import Path
+from benchmarks.startup import BASELINE, REPO_DIR, compare
+from benchmarks.synthetic import write_synthetic_csv, write_synthetic_store
+from resale.appreciation import appreciation_ratios, trailing_appreciation
+from resale.blocks import build_partials, window_totals
+from resale.cube import CUBE_COLUMNS, build_price_cube, cube_towns
+from resale.forecast import price_bands, project_prices, simulate_growth
+from resale.geocode import GEOCODE_CSV, load_geocodes
+from resale.projection import project_savings
+from resale.ranking import budget_chance
+from resale.schema import normalise
+from resale.sketch import build_sketches
+from resale.store import load_resale_dataset
+
+SIZES = {"100k": 100_000, "1M": 1_000_000, "10M": 10_000_000}
+DATA_DIR = REPO_DIR / "bench_data"  # generated once per size and reused
+OUTPUT = REPO_DIR / "bench_output.txt"
+FLAT_TYPE = "4 ROOM"
+SLACK_S = 0.002  # several cases take only a few milliseconds
+
+
+def page_namespace(page: str):
+    # A page's imports, constants and functions, without running its widgets.
+    # Cache decorators are dropped so every call does the real work.
+    tree = ast.parse((REPO_DIR / page).read_text())
+    body = []
+    script_started = False
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            body.append(node)
+        elif isinstance(node, ast.FunctionDef):
+            node.decorator_list = []
+            body.append(node)
+        elif isinstance(node, ast.Assign) and not script_started:
+            body.append(node)
+        else:
+            script_started = True
+    namespace = {"__name__": f"bench_{Path(page).stem}"}
+    exec(compile(ast.Module(body, type_ignores=[]), page, "exec"), namespace)
+    return namespace
+
+
+def prepare(size: str):
+    workdir = DATA_DIR / size
+    if not (workdir / "data" / "meta.json").exists():
+        write_synthetic_store(workdir, SIZES[size])
+    if not (workdir / "raw.csv").exists():
+        write_synthetic_csv(workdir / "raw.csv", SIZES[size])
+    return workdir
+
+
+def hot_paths(workdir: Path):
+    # (name, callable) in page order; each callable's inputs are built here,
+    # outside the timed region
+    main_page = page_namespace("main.py")
+    map_page = page_namespace("map.py")
+    store_dir = workdir / "data"
+    # The synthetic meta.json may be days old; never go to the network
+    df = load_resale_dataset(store_dir=store_dir, refresh_after=timedelta.max)
+    start = datetime.today()
+
+    cube = build_price_cube(df)
+    main_page.update(price_cube=cube, agg_method="Median")
+    towns = cube_towns(cube, FLAT_TYPE)
+    pivot = main_page["generate_pivot"](FLAT_TYPE, towns)
+
+    def appreciation_and_future():
+        rates = trailing_appreciation(appreciation_ratios(pivot)).round(2)
+        return project_prices(pivot.iloc[-1], rates.loc["5 Years"], start.year, 30)
+
+    def simulate_prices():
+        # Every town, 10k paths over 30 years, as main.py runs it
+        growth = simulate_growth(appreciation_ratios(pivot).tail(5), pivot.columns, 30)
+        bands = price_bands(pivot.iloc[-1], growth, start.year)
+        return bands, budget_chance(pivot.iloc[-1], growth, 1_000_000)
+
+    map_df = df.drop(columns=["storey_range", "flat_model", "remaining_lease"])
+    map_df["lease_commence_date"] = map_page["remaining_lease"](
+        map_df["lease_commence_date"]
+    )
+    partials = build_partials(map_df)
+    months = (map_df["month"].max() - map_df["month"].min()).n + 1
+    window = window_totals(partials, map_df["month"].max(), months)
+    geocodes = load_geocodes(REPO_DIR / GEOCODE_CSV)
+    blocks, _, _ = map_page["add_lat_long"](map_df, window, geocodes, ())
+    prices = blocks["resale_price"]
+
+    return [
+        ("ingest_csv", lambda: normalise(pd.read_csv(workdir / "raw.csv"))),
+        (
+            "load_store",
+            lambda: load_resale_dataset(
+                store_dir=store_dir, refresh_after=timedelta.max
+            ),
+        ),
+        (
+            "load_main_columns",
+            lambda: load_resale_dataset(
+                store_dir=store_dir,
+                refresh_after=timedelta.max,
+                columns=CUBE_COLUMNS,
+            ),
+        ),
+        (
+            "load_map_window",
+            lambda: load_resale_dataset(
+                map_page["datasets"],
+                store_dir,
+                refresh_after=timedelta.max,
+                columns=map_page["SOURCE_COLUMNS"],
+                months=(pd.Period(start, "M") - 11, None),
+            ),
+        ),
+        ("build_price_cube", lambda: build_price_cube(df, build_sketches(df))),
+        ("generate_pivot", lambda: main_page["generate_pivot"](FLAT_TYPE, towns)),
+        ("appreciation_and_future", appreciation_and_future),
+        ("simulate_prices", simulate_prices),
+        (
+            "project_savings",
+            lambda: project_savings(
+                start, 360, 30, 6, 5000, 3, 1, 10000, 1000, 0.05, 2.5, 100000, 20000
+            ),
+        ),
+        (
+            "collate_past_transactions",
+            lambda: map_page["collate_past_transactions"](map_df, ()),
+        ),
+        ("build_partials", lambda: build_partials(map_df)),
+        (
+            "add_lat_long",
+            lambda: map_page["add_lat_long"](map_df, window, geocodes, ()),
+        ),
+        (
+            "colour_nodes",
+            lambda: map_page["colour_nodes"](
+                blocks, prices.min(), prices.median(), prices.max()
+            ),
+        ),
+        # Shallow copy: offset_coords shifts lat in place
+        ("offset_coords", lambda: map_page["offset_coords"](blocks.copy(deep=False))),
+    ]
+
+
+def best_time(func, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def format_results(results: dict, baseline: dict):
+    lines = [f"{'size':<6}{'case':<28}{'seconds':>10}{'baseline':>10}{'ratio':>8}"]
+    for size, cases in results.items():
+        for case, seconds in cases.items():
+            expected = baseline.get(size, {}).get(case)
+            if expected:
+                lines.append(
+                    f"{size:<6}{case:<28}{seconds:>10.4f}{expected:>10.4f}"
+                    f"{seconds / expected:>8.2f}"
+                )
+            else:
+                lines.append(f"{size:<6}{case:<28}{seconds:>10.4f}{'-':>10}{'-':>8}")
+    return lines
+
+
+def main(argv: list | None = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.suite",
+        description="Timings for the hot paths of main.py and map.py.",
+    )
+    parser.add_argument("--sizes", nargs="+", default=list(SIZES), choices=SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--cases", nargs="+", help="only run these cases")
+    parser.add_argument(
+        "--save", action="store_true", help="record as the new baseline"
+    )
+    args = parser.parse_args(argv)
+
+    results = {}
+    for size in args.sizes:
+        paths = hot_paths(prepare(size))
+        results[size] = {
+            case: round(best_time(func, args.repeat), 4)
+            for case, func in paths
+            if not args.cases or case in args.cases
+        }
+        del paths
+        gc.collect()
+
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+    lines = format_results(results, baseline.get("suite", {}))
+    if args.save:
+        suite = baseline.setdefault("suite", {})
+        for size, cases in results.items():
+            suite.setdefault(size, {}).update(cases)
+        BASELINE.write_text(json.dumps(baseline, indent=2) + "\n")
+        regressions = []
+    else:
+        regressions = compare(results, baseline.get("suite", {}), slack=SLACK_S)
+        lines += [f"REGRESSION {regression}" for regression in regressions]
+    OUTPUT.write_text("\n".join(lines) + "\n")
+    print("\n".join(lines))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
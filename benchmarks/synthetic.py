@@ -0,0 +1,117 @@
+import json
+import shutil
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from pathlib import Path
+from resale.geocode import GEOCODE_CSV
+from resale.ingest import DATASETS
+from resale.schema import normalise
+from resale.store import partition_path, write_frame
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+TOWNS = [
+    "ANG MO KIO",
+    "BEDOK",
+    "BISHAN",
+    "BUKIT BATOK",
+    "BUKIT MERAH",
+    "BUKIT PANJANG",
+    "BUKIT TIMAH",
+    "CENTRAL AREA",
+    "CHOA CHU KANG",
+    "CLEMENTI",
+    "GEYLANG",
+    "HOUGANG",
+    "JURONG EAST",
+    "JURONG WEST",
+    "KALLANG/WHAMPOA",
+    "MARINE PARADE",
+    "PASIR RIS",
+    "PUNGGOL",
+    "QUEENSTOWN",
+    "SEMBAWANG",
+    "SENGKANG",
+    "SERANGOON",
+    "TAMPINES",
+    "TOA PAYOH",
+    "WOODLANDS",
+    "YISHUN",
+]
+FLAT_TYPES = ["1 ROOM", "2 ROOM", "3 ROOM", "4 ROOM", "5 ROOM", "EXECUTIVE"]
+FLAT_TYPE_SHARES = [0.01, 0.04, 0.3, 0.35, 0.2, 0.1]
+# Month ranges covered by each dataset in DATASETS, oldest first
+DATASET_MONTHS = [
+    ("1990-01", "1999-12"),
+    ("2000-01", "2012-02"),
+    ("2012-03", "2014-12"),
+    ("2015-01", "2016-12"),
+    ("2017-01", None),  # up to this month
+]
+
+
+def synthetic_transactions(rows: int, start: str, end: str, seed: int = 0):
+    # Raw rows shaped like the data.gov.sg CSVs, on real blocks from the
+    # geocode file so the map can place them
+    rng = np.random.default_rng(seed)
+    blocks = pd.read_csv(REPO_DIR / GEOCODE_CSV, usecols=["block", "street_name"])
+    months = pd.period_range(start, end, freq="M")
+    month_idx = np.sort(rng.integers(0, len(months), rows))
+    block_idx = rng.integers(0, len(blocks), rows)
+    flat_type = rng.choice(len(FLAT_TYPES), rows, p=FLAT_TYPE_SHARES)
+    years = months[month_idx].year.to_numpy() - 1990
+    price = (80000 + flat_type * 60000) * 1.04**years * rng.lognormal(0, 0.15, rows)
+    df = pd.DataFrame(
+        {
+            "month": months[month_idx].strftime("%Y-%m"),
+            "town": np.array(TOWNS)[block_idx % len(TOWNS)],
+            "flat_type": np.array(FLAT_TYPES)[flat_type],
+            "block": blocks["block"].to_numpy()[block_idx],
+            "street_name": blocks["street_name"].to_numpy()[block_idx],
+            "storey_range": "04 TO 06",
+            "floor_area_sqm": 40.0 + flat_type * 15,
+            "flat_model": "Improved",
+            "lease_commence_date": rng.integers(1966, 2020, rows),
+            "resale_price": price.round(-3),
+        }
+    )
+    if start >= "2015":  # only the newer datasets publish remaining_lease
+        df["remaining_lease"] = "61 years 04 months"
+    return df
+
+
+def write_synthetic_store(workdir: Path, rows: int):
+    # A page-ready working directory: data/ with every partition and a fresh
+    # meta.json, plus the geocode file the map reads from the working directory
+    store_dir = Path(workdir) / "data"
+    store_dir.mkdir(parents=True, exist_ok=True)
+    shutil.copy(REPO_DIR / GEOCODE_CSV, Path(workdir) / GEOCODE_CSV)
+    meta = {}
+    this_month = pd.Period(datetime.today(), "M").strftime("%Y-%m")
+    for seed, (dataset, (start, end)) in enumerate(zip(DATASETS, DATASET_MONTHS)):
+        df = synthetic_transactions(
+            rows // len(DATASETS), start, end or this_month, seed
+        )
+        write_frame(partition_path(store_dir, dataset), normalise(df))
+        meta[dataset] = {
+            "fetched_at": datetime.now().isoformat(timespec="seconds"),
+            "rows": len(df),
+        }
+    with open(store_dir / "meta.json", "w") as f:
+        json.dump(meta, f, indent=2)
+    return store_dir
+
+
+def write_synthetic_csv(path: Path, rows: int, chunk_rows: int = 1_000_000):
+    # One raw CSV in the latest dataset's layout, written in chunks so large
+    # sizes do not have to fit in memory as strings
+    this_month = pd.Period(datetime.today(), "M").strftime("%Y-%m")
+    start = DATASET_MONTHS[-1][0]
+    for seed, offset in enumerate(range(0, rows, chunk_rows)):
+        df = synthetic_transactions(
+            min(chunk_rows, rows - offset), start, this_month, seed
+        )
+        df.to_csv(
+            path, mode="w" if offset == 0 else "a", header=offset == 0, index=False
+        )
+    return path
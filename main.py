@@ -1,58 +1,86 @@
-import requests
-import json
-import pandas as pd
 import calendar
+import json
 import streamlit as st
 from dateutil.relativedelta import relativedelta
 from datetime import datetime
 from datetime import date
-from io import StringIO
 from pathlib import Path
+from resale.timing import Timings, background_timings, enabled_from_env
 
 # Instantiate
 current_path = Path.cwd()
-datasets = [  # These datasets are from 'Resale Flat Prices' https://data.gov.sg/collections/189/view
-    "d_ebc5ab87086db484f88045b47411ebc5",
-    "d_43f493c6c50d54243cc1eab0df142d6a",
-    "d_2d5ff9ea31397b66239f245f57751537",
-    "d_ea9ed51da2787afaf8e51f827c304208",
-    "d_8b84c4ee58e3cfc0ece0d773c8ca6abc",
-]
 months = list(calendar.month_name)[1:]
 today = datetime.today()
-msr = 0.3
+# Per-run stage timings, shown in the sidebar with ?debug=1
+timings = Timings(st.query_params.get("debug") == "1" or enabled_from_env())
+
+
+# Loads on the refresher threads outlive the run that started them, so they
+# are timed into one collector per process that every debug sidebar shows
+@st.cache_resource
+def load_timings():
+    return background_timings()
 
 
 # Download datasets
-@st.cache_data
+@load_timings().timed
 def download_resale_hdb_dataset():
-    temp_dfs = []
-    for dataset in datasets:
-        response = requests.get(
-            "https://api-open.data.gov.sg/v1/public/api/datasets/"
-            + dataset
-            + "/initiate-download",
-            headers={"Content-Type": "application/json"},
-        )
-        response = requests.get(response.json().get("data").get("url"))
-        response = response.content.decode("utf-8")
-        temp_df = pd.read_csv(StringIO(response))
-        temp_dfs.append(temp_df)
-    return_df = pd.concat(temp_dfs, ignore_index=True)
-    return_df["flat_type"] = return_df["flat_type"].str.replace(
-        "MULTI GENERATION", "MULTI-GENERATION", case=False, regex=True
+    # pandas and the store are imported here, off the first render
+    from resale.cube import CUBE_COLUMNS
+    from resale.store import load_resale_dataset
+
+    # Only the columns the price cube uses are read from the store
+    return load_resale_dataset(store_dir=current_path / "data", columns=CUBE_COLUMNS)
+
+
+@load_timings().timed
+def load_price_cube():
+    from resale.cube import build_price_cube
+    from resale.store import load_resale_sketches
+
+    hdb_df = download_resale_hdb_dataset()
+    price_cube = build_price_cube(
+        hdb_df, load_resale_sketches(store_dir=current_path / "data")
     )
-    columns_to_remove = [
-        "block",
-        "street_name",
-        "storey_range",
-        "floor_area_sqm",
-        "flat_model",
-        "lease_commence_date",
-        "remaining_lease",
-    ]
-    return_df = return_df.drop(columns=columns_to_remove)
-    return return_df
+    # Only the cube and the date range are kept for the process; the row-level
+    # frame is released once the cube has been built
+    month_range = (hdb_df["month"].min(), hdb_df["month"].max())
+    return month_range, price_cube
+
+
+# Aggregates are shared read-only across sessions and built on a background
+# thread, so the header and inputs render while the store loads. The same
+# thread rebuilds them once the latest dataset is due a refresh and swaps the
+# new cube in; reruns never wait on a refresh.
+@st.cache_resource(show_spinner=False, on_release=lambda loader: loader.stop())
+def start_loading_price_cube():
+    from resale.refresh import Refresher
+
+    return Refresher(load_price_cube, name="price-cube").start()
+
+
+@timings.timed
+def wait_for_price_cube():
+    # A failed first load is retried in the background and raised here
+    return start_loading_price_cube().result()
+
+
+def render_timings():
+    background = load_timings()
+    with st.sidebar:
+        st.subheader("Timings")
+        st.dataframe(timings.to_records(), hide_index=True)
+        st.subheader("Background loads")
+        st.dataframe(background.to_records(), hide_index=True)
+        st.download_button(
+            "Export JSON",
+            json.dumps(
+                {"run": timings.to_records(), "background": background.to_records()},
+                indent=2,
+            ),
+            file_name="timings.json",
+            mime="application/json",
+        )
 
 
 # Months diff
@@ -64,60 +92,12 @@ def months_diff(future_year: int, future_month: int):
     return total_months
 
 
-def calc_cpf_oa_increase(salary: int, year: int, age: int):
-    portion_to_oa = 0
-    cap = 0
-
-    if year == 2025:
-        cap = 7400
-    else:
-        cap = 8000
-
-    if age <= 35:
-        portion_to_oa = 0.6217
-    elif age <= 45:
-        portion_to_oa = 0.5677
-    elif age <= 50:
-        portion_to_oa = 0.5136
-    elif age <= 55:
-        portion_to_oa = 0.4055
-    elif age <= 60:
-        portion_to_oa = 0.3694
-    elif age <= 65:
-        portion_to_oa = 0.149
-    elif age <= 70:
-        portion_to_oa = 0.0607
-    else:
-        portion_to_oa = 0.08
-
-    return min(salary, cap) * 0.37 * portion_to_oa
-
-
-def calc_loan_based_on_msr_salary(payment: float, interest: float, years: int):
-    interest = interest / 100 / 12
-    total_payments = years * 12
-    loan = payment * (1 - (1 + interest) ** (-total_payments)) / interest
-    return loan
-
-
 # Main function here
-hdb_df = download_resale_hdb_dataset()
+start_loading_price_cube()
 
 # Header
 st.title("Can you afford a resale HDB?")
-earliest_date = pd.to_datetime(hdb_df["month"].min())
-latest_date = pd.to_datetime(hdb_df["month"].max())
-st.text(
-    "Property data from "
-    + earliest_date.strftime("%b")
-    + " "
-    + str(earliest_date.year)
-    + " to "
-    + latest_date.strftime("%b")
-    + " "
-    + str(latest_date.year)
-    + " from https://data.gov.sg/collections/189/view"
-)
+data_range = st.empty()  # filled in once the dataset has loaded
 st.divider()
 
 # Inputs
@@ -185,77 +165,35 @@ with sal_col3:
     sal_raise_month = st.selectbox("Annual Raise Month", months)
 cpf_bal = st.number_input("Current CPF(O/A) Balance ($)", step=100)
 
+# Deferred until the inputs above are on screen
+import pandas as pd
+from resale.affordability import MSR, calc_loan_based_on_msr_salary
+from resale.projection import project_savings
+
 st.subheader(f"Your Projection")
 
 if bank_bal and bank_bal_inc and cpf_bal and age > 0:
-    cpf_bal_inc = calc_cpf_oa_increase(salary, today.year, age)
-    columns = [
-        "Salary",
-        "Bank Increase",
-        "Bank Interest",
-        "Bank Balance",
-        "CPF(OA) Increase",
-        "CPF(OA) Interest",
-        "CPF(OA) Balance",
-        "Total balance",
-    ]
-    next_row = {
-        "Salary": salary,
-        "Bank Increase": bank_bal_inc,
-        "Bank Interest": 0,
-        "Bank Balance": bank_bal,
-        "CPF(OA) Increase": cpf_bal_inc,
-        "CPF(OA) Interest": 0,
-        "CPF(OA) Balance": cpf_bal,
-        "Total balance": 0,
-    }
-    proj_df = pd.DataFrame(columns=columns)
-    current_date = datetime.today()
-    next_date = current_date
-    pending_cpf = []
-    for row in range(0, months_diff(future_birthday.year, future_birthday.month) + 1):
-        # Age
-        if next_date.year > today.year and next_date.month == birthday.month:
-            age += 1
-        ## Count Bank Balance
-        # Annual increment month
-        if next_date.month == datetime.strptime(sal_raise_month, "%B").month:
-            salary += salary_raise / 100 * salary
-            bank_bal_inc += salary_raise / 100 * bank_bal_inc
-            next_row["Salary"] = salary
-            next_row["Bank Increase"] = bank_bal_inc
-        next_row["Bank Interest"] = (
-            next_row["Bank Balance"] * bank_base_interest / 12 / 100
-            + min(next_row["Bank Balance"], bank_bonus_interest_cap)
-            * bank_bonus_interest
-            / 12
-            / 100
-        )
-        next_row["Bank Balance"] = (
-            next_row["Bank Balance"] + next_row["Bank Interest"] + bank_bal_inc
+    with timings.stage("project_savings") as stage:
+        proj_df = project_savings(
+            today,
+            months_diff(future_birthday.year, future_birthday.month) + 1,
+            age,
+            birthday.month,
+            salary,
+            salary_raise,
+            datetime.strptime(sal_raise_month, "%B").month,
+            bank_bal,
+            bank_bal_inc,
+            bank_base_interest,
+            bank_bonus_interest,
+            bank_bonus_interest_cap,
+            cpf_bal,
         )
-        cpf_bal_inc = calc_cpf_oa_increase(salary, next_date.year, age)
-        next_row["CPF(OA) Increase"] = cpf_bal_inc
-        ## Count CPF Balance
-        if next_date.month == 1:
-            for interest in pending_cpf:
-                next_row["CPF(OA) Balance"] += interest
-            pending_cpf = []
-        next_row["CPF(OA) Interest"] = next_row["CPF(OA) Balance"] * 2.5 / 12 / 100
-        pending_cpf.append(next_row["CPF(OA) Interest"])
-        next_row["CPF(OA) Balance"] += next_row["CPF(OA) Increase"]
-        # Add row
-        next_row["Total balance"] = (
-            next_row["Bank Balance"] + next_row["CPF(OA) Balance"]
-        )
-        next_row_pd = pd.DataFrame([next_row], index=[next_date.strftime("%Y-%m")])
-        proj_df = pd.concat([proj_df, next_row_pd])
-        next_date += relativedelta(months=1)
-    # Create an empty DataFrame with the specified columns
-    proj_df.index.name = "Year/Month"
+        stage["rows_out"] = len(proj_df)
+    total_balance = proj_df["Total balance"].iloc[-1] if len(proj_df) else 0
     proj_df = proj_df.round(2)
     st.dataframe(proj_df)
-    st.success(f"You will have ${next_row['Total balance']:,.2f} on {buy_date}. ")
+    st.success(f"You will have ${total_balance:,.2f} on {buy_date}. ")
     st.info(
         "Note: The projection assumes your saving/spending habits remain proportional to your salary. CPF(OA) interest accrued for earlier months of the current year are not included. "
     )
@@ -266,6 +204,7 @@ else:
 st.divider()
 
 st.subheader("Downpayment & Loan")
+max_property = None
 if bank_bal and bank_bal_inc and cpf_bal and age > 0:
     col1, col2 = st.columns([4, 1])
     col3, col4 = st.columns([4, 1])
@@ -291,7 +230,7 @@ if bank_bal and bank_bal_inc and cpf_bal and age > 0:
     pay_col1, pay_col2, pay_col3 = st.columns(3)
     latest_salary = proj_df["Salary"].iloc[-1]
     latest_cpf = proj_df["CPF(OA) Increase"].iloc[-1]
-    monthly_repayment = msr * latest_salary
+    monthly_repayment = MSR * latest_salary
     with pay_col1:
         loan_repayment_val = st.number_input(
             "30% of Projected Income ($)", value=monthly_repayment, disabled=True
@@ -354,69 +293,68 @@ else:
 st.divider()
 # Filters for options
 st.subheader("HDB Projection")
-flat_types = sorted(hdb_df["flat_type"].unique())
+from resale.appreciation import HORIZONS, appreciation_ratios, trailing_appreciation
+from resale.cube import cube_flat_types, cube_pivot, cube_towns
+from resale.forecast import (
+    SIMULATION_PATHS,
+    price_bands,
+    project_prices,
+    simulate_growth,
+)
+from resale.ranking import budget_chance, rank_towns
+
+with st.spinner("Loading resale prices..."):
+    (earliest_date, latest_date), price_cube = wait_for_price_cube()
+data_range.text(
+    "Property data from "
+    + earliest_date.strftime("%b")
+    + " "
+    + str(earliest_date.year)
+    + " to "
+    + latest_date.strftime("%b")
+    + " "
+    + str(latest_date.year)
+    + " from https://data.gov.sg/collections/189/view"
+)
+flat_types = cube_flat_types(price_cube)
 
 
 proj_col1, proj_col2 = st.columns(2)
 with proj_col1:
     selected_flat_type = st.selectbox("Desired Flat Type", options=flat_types, index=2)
 with proj_col2:
-    agg_method = st.selectbox("Calculation of Average", options=["Median","Mean"], index=0)
+    agg_method = st.selectbox(
+        "Calculation of Average",
+        options=["Median", "Mean", "P25", "P75", "P90"],
+        index=0,
+        help="Percentiles are estimated from price sketches and are within 1% of the exact value.",
+    )
 
-towns = sorted(hdb_df[hdb_df["flat_type"] == selected_flat_type]["town"].unique())
+towns = cube_towns(price_cube, selected_flat_type)
 selected_town = st.pills(
     "Desired Towns", options=towns, default=towns, selection_mode="multi"
 )
-filtered_df = hdb_df[
-    (hdb_df["flat_type"] == selected_flat_type) & (hdb_df["town"].isin(selected_town))
-]
 
 
-def generate_pivot(filtered_df: pd.DataFrame):
-    filtered_df = filtered_df.copy()
-    filtered_df["year"] = pd.to_datetime(filtered_df["month"]).dt.year
-    pivot = pd.pivot_table(
-        filtered_df, values="resale_price", index="year", columns="town", aggfunc=agg_method.lower()
+@timings.timed
+def generate_pivot(selected_flat_type: str, selected_town: list):
+    pivot = cube_pivot(
+        price_cube, selected_flat_type, selected_town, agg=agg_method.lower()
     )
-    pivot.index.name = "Year"
     return pivot.round(2)
 
 
-pivot = generate_pivot(filtered_df)
+pivot = generate_pivot(selected_flat_type, selected_town)
 
 # Appreciation hdb_df
 if selected_town:
     st.text(
         "Average Annual Appreciation (%) Over Last __ Years by Town (For Reference)"
     )
-    average_appreciation_df = pivot.tail(16).copy()
-    for col in average_appreciation_df.columns:
-        for row in reversed(average_appreciation_df.index[1:]):
-            i = average_appreciation_df.index.get_loc(row)
-            prev_row = average_appreciation_df.index[i - 1]
-            value = (
-                average_appreciation_df.loc[row, col]
-                / average_appreciation_df.loc[prev_row, col]
-            )
-            average_appreciation_df.loc[row, col] = (
-                average_appreciation_df.loc[row, col]
-                / average_appreciation_df.loc[prev_row, col]
-            )
-    average_appreciation_df = average_appreciation_df.drop(
-        average_appreciation_df.index[0]
-    )  # Remove first row, as it is not an inflation rate
-    # Appreciation rate over past years
-    past_appreciation_df = pivot.tail(1).copy()
-    past_appreciation_df = past_appreciation_df.drop(past_appreciation_df.index[0])
-    for last_n in [1, 3, 5, 10, 15]:
-        average_row = (
-            average_appreciation_df.tail(last_n).mean(numeric_only=True) - 1
-        ) * 100  # calculates average for numeric columns only
-        past_appreciation_df.loc[f"{last_n} Years"] = average_row
-    past_appreciation_df.index.name = "Appreciation Over Last"
-    past_appreciation_df[
-        past_appreciation_df.select_dtypes(include="number").columns
-    ] = past_appreciation_df.select_dtypes(include="number").round(2)
+    with timings.stage("appreciation", rows_in=len(pivot)):
+        average_appreciation_df = appreciation_ratios(pivot)
+        # Appreciation rate over past years
+        past_appreciation_df = trailing_appreciation(average_appreciation_df).round(2)
     st.dataframe(past_appreciation_df)
     col1, col2 = st.columns(2)
     with col1:
@@ -432,25 +370,17 @@ if selected_town:
             value=future_birthday.year - today.year,
         )
 
-    # Another hdb_df to show projection
-    future_years = list(
-        range(datetime.now().year, datetime.now().year + proj_period + 1)
-    )
-
     # Future hdb_df
     st.text("Historical and Projected Average Resale HDB Prices by Year and Town")
-    future_df = pd.DataFrame(index=future_years, columns=pivot.columns)
-    future_df.index.name = "Year"
-    for col in pivot.columns:
-        future_df.loc[future_df.index[0], col] = pivot.loc[pivot.index[-1], col]
-        for idx in future_df.index[1:]:
-            i = future_df.index.get_loc(idx)
-            prev_row = future_df.index[i - 1]
-            value = future_df.loc[prev_row, col] * (
-                1 + past_appreciation_df.loc[appreciation_rate, col] / 100
-            )
-            future_df.loc[idx, col] = value
-    future_df = future_df.round(2)
+    with timings.stage("project_prices") as stage:
+        future_df = project_prices(
+            pivot.iloc[-1],
+            past_appreciation_df.loc[appreciation_rate],
+            datetime.now().year,
+            proj_period,
+        )
+        future_df = future_df.round(2)
+        stage["rows_out"] = len(future_df)
     # future_df = future_df.iloc[1:]
     combined_df = pd.concat([pivot, future_df.iloc[1:]])
     styled_df = combined_df.style.format("{:.2f}")
@@ -460,6 +390,23 @@ if selected_town:
     else:
         st.dataframe(future_df)
 
+    simulate = st.toggle(
+        "Simulate price ranges",
+        help=f"Replays each town's year-over-year price changes from the same past years, {SIMULATION_PATHS:,} times, instead of compounding their average.",
+    )
+    if simulate:
+        with timings.stage("simulate_prices", rows_in=len(pivot.columns)):
+            horizon = HORIZONS[past_appreciation_df.index.get_loc(appreciation_rate)]
+            growth = simulate_growth(
+                average_appreciation_df.tail(horizon),
+                pivot.columns,
+                max(proj_period, 0),
+            )
+            bands_df = price_bands(pivot.iloc[-1], growth, datetime.now().year)
+            bands_df = bands_df.round(2)
+        st.text("Projected Price Ranges (P10, P50, P90) by Year and Town")
+        st.dataframe(bands_df)
+
     def highlight_negative_row(row: pd.Series):
         if row["Balance from Budget"] < 0:
             return ["color: red"] * len(row)  # apply red text color to entire row
@@ -467,36 +414,23 @@ if selected_town:
             return [""] * len(row)  # no style
 
     st.text("Most to Least Affordable Towns")
-    # Get last row as a Series
-    last_row = combined_df.iloc[-1]
-    # Sort values descending
-    sorted_last_row = last_row.sort_values(ascending=True)
-    # Convert to DataFrame with 'Town' and 'Value' columns
-    try:
-        sorted_df = pd.DataFrame(
-            {
-                "Town": sorted_last_row.index,
-                "Value": sorted_last_row.values,
-                "Balance from Budget": max_property - sorted_last_row.values,
-            }
-        )
-    except:
-        sorted_df = pd.DataFrame(
-            {"Town": sorted_last_row.index, "Value": sorted_last_row.values}
-        )
-    # Show in Streamlit
-    sorted_df.index = range(1, len(sorted_df) + 1)
-    sorted_df.index.name = "Rank"
-    try:
+    # Towns ranked by their price in the last projected year
+    with timings.stage("rank_towns", rows_in=len(combined_df.columns)) as stage:
+        chance = None
+        if simulate and max_property is not None:
+            chance = budget_chance(pivot.iloc[-1], growth, max_property)
+        sorted_df = rank_towns(combined_df.iloc[-1], max_property, chance)
+        stage["rows_out"] = len(sorted_df)
+    if max_property is not None:
         st.dataframe(
             sorted_df.style.apply(highlight_negative_row, axis=1).format(
                 {
-                    col: "{:,.2f}"
+                    col: "{:.0%}" if col == "Chance within Budget" else "{:,.2f}"
                     for col in sorted_df.select_dtypes(include="number").columns
                 }
             )
         )
-    except:
+    else:
         # Round numeric columns to 2 decimals *in the data itself*
         rounded_df = sorted_df.copy()
         numeric_cols = rounded_df.select_dtypes(include=["number"]).columns
@@ -505,3 +439,6 @@ if selected_town:
         st.warning(
             "Complete the sections 'Your Projection' and 'Downpayment & Loan' sections to see cash balance after the initial budget."
         )
+
+if timings.enabled:
+    render_timings()
@@ -1,18 +1,36 @@
-import time
+import json
 import streamlit as st
 import pandas as pd
 import numpy as np
-import pydeck as pdk
-import requests
-import urllib.parse
-import json
-import altair as alt
-import calendar
-from dateutil.relativedelta import relativedelta
 from datetime import datetime
-from datetime import date
-from io import StringIO
 from pathlib import Path
+from resale.blocks import BlockWindow, block_means, window_totals
+from resale.colours import (
+    PRICE_BIN_WIDTH,
+    normalise_prices,
+    price_colours,
+    price_histogram,
+)
+from resale.geocode import (
+    GEOCODE_CSV,
+    Geocodes,
+    load_geocodes,
+    lookup_coordinates,
+    lookup_positions,
+    within_radius,
+)
+from resale.memo import (
+    SHARED_CACHE_BYTES,
+    SHARED_CACHE_SIZE,
+    STAGE_CACHE_SIZE,
+    LRUCache,
+)
+from resale.history import (
+    TransactionHistory,
+    collate_transactions,
+    history_html,
+)
+from resale.timing import Timings, background_timings, enabled_from_env
 
 # Instantiate
 current_path = Path.cwd()
@@ -24,84 +42,177 @@ datasets = [  # These datasets are from 'Resale Flat Prices' https://data.gov.sg
     "d_8b84c4ee58e3cfc0ece0d773c8ca6abc"  # you only need the latest file, since only past 12 months
 ]
 today = datetime.today()
+# Per-run stage timings, shown in the sidebar with ?debug=1
+timings = Timings(st.query_params.get("debug") == "1" or enabled_from_env())
+MAX_SCATTER_POINTS = 20000  # above this the map aggregates into hexagons
+MAP_COLUMNS = [
+    "town",
+    "flat_type",
+    "block",
+    "street_name",
+    "lease_commence_date",
+    "resale_price_formatted",
+    "lon",
+    "lat",
+    "r",
+    "g",
+    "b",
+]
+SOURCE_COLUMNS = [  # read from the store, for the last 12 months only
+    "month",
+    "town",
+    "flat_type",
+    "block",
+    "street_name",
+    "floor_area_sqm",
+    "lease_commence_date",
+    "resale_price",
+]
+
+
+# Loads on the refresher threads outlive the run that started them, so they
+# are timed into one collector per process that every debug sidebar shows
+@st.cache_resource
+def load_timings():
+    return background_timings()
 
 
 # Download datasets
-@st.cache_data
+@load_timings().timed
 def download_resale_hdb_dataset():
-    temp_dfs = []
-    for dataset in datasets:
-        response = requests.get(
-            "https://api-open.data.gov.sg/v1/public/api/datasets/"
-            + dataset
-            + "/initiate-download",
-            headers={"Content-Type": "application/json"},
-        )
-        response = requests.get(response.json().get("data").get("url"))
-        response = response.content.decode("utf-8")
-        temp_df = pd.read_csv(StringIO(response))
-        temp_dfs.append(temp_df)
-    return_df = pd.concat(temp_dfs, ignore_index=True)
-    return_df["flat_type"] = return_df["flat_type"].str.replace(
-        "MULTI GENERATION", "MULTI-GENERATION", case=False, regex=True
-    )
-    columns_to_remove = ["storey_range", "flat_model", "remaining_lease"]
-    return_df["lease_commence_date"] = 99 - (
-        today.year - return_df["lease_commence_date"]
+    # The store pulls in requests and pyarrow, so it is imported off the page
+    from resale.store import load_resale_dataset
+
+    return_df = load_resale_dataset(
+        datasets,
+        current_path / "data",
+        columns=SOURCE_COLUMNS,
+        months=(pd.Period(datetime.today(), "M") - 11, None),
     )
-    return_df = return_df.drop(columns=columns_to_remove)
+    return_df["lease_commence_date"] = remaining_lease(return_df["lease_commence_date"])
+    # Month order lets every session take its recent rows as a slice of the
+    # shared frame instead of a masked copy
+    if not return_df["month"].is_monotonic_increasing:
+        return_df = return_df.sort_values("month", kind="stable", ignore_index=True)
     return return_df
 
 
-def price_to_rgb(x: float):
-    midpoint = 0.5  # set this to 0.66 or 0.75 as needed
-    if x < midpoint:
-        # green to yellow
-        r = int((x / midpoint) * 255)
-        g = 255
-        b = 0
-    else:
-        # yellow to red
-        r = 255
-        g = int(((1 - x) / (1 - midpoint)) * 255)
-        b = 0
-    return f"rgb({r}, {g}, {b})"
+def remaining_lease(lease_commence_date):
+    return 99 - (today.year - lease_commence_date)
 
 
-def extract_price_bin_value(x: str):
-    if x == "≥ $1M":
-        return float("inf")  # push to the end
-    else:
-        return int(x.replace("$", "").replace(",", ""))
-
-
-def rgb_str_to_pydeck_color(rgba_str: str):
-    parts = rgba_str.strip("rgb()").split(",")
-    r, g, b = map(int, parts[:3])
-    return [r, g, b]
-
-
-@st.cache_data
-def collate_past_transactions(df: pd.DataFrame):
-    # Sort once beforehand instead of in every group
-    df_sorted = df.sort_values("month", ascending=False).copy()
-    # Zip month and resale_price into dicts
-    df_sorted["txn"] = list(zip(df_sorted["month"], df_sorted["resale_price"]))
-    # Group and convert each txn to desired format
-    collapsed_df = (
-        df_sorted.groupby(["town", "flat_type", "block", "street_name"])["txn"]
-        .apply(lambda txns: [{"month": m, "resale_price": p} for m, p in txns])
-        .reset_index(name="past_transactions")
+@load_timings().timed
+def load_map_data():
+    from resale.store import dataset_version, load_block_partials
+
+    # Partials and version are read after the dataset, which may have just
+    # refreshed them
+    hdb_df = download_resale_hdb_dataset()
+    partials = load_block_partials(datasets, current_path / "data")
+    return hdb_df, partials, dataset_version(datasets, current_path / "data")
+
+
+def stop_loading(loaders: dict):
+    for loader in loaders.values():
+        loader.stop()
+
+
+# Dataset and geocodes load per process on background threads, in parallel,
+# while the page header renders. The dataset thread reloads it once the
+# latest partition is due a refresh and swaps the new snapshot in, so reruns
+# never wait on a refresh.
+@st.cache_resource(show_spinner=False, on_release=stop_loading)
+def start_loading():
+    from resale.refresh import Refresher
+
+    return {
+        "data": Refresher(load_map_data, name="map-data").start(),
+        "geocodes": Refresher(
+            lambda: load_timings().timed(load_geocodes)(current_path / GEOCODE_CSV),
+            interval=None,  # a file in the repo, loaded once
+            name="geocodes",
+        ).start(),
+    }
+
+
+def wait_for(name: str):
+    # A failed first load is retried in the background and raised here
+    return start_loading()[name].result()
+
+
+# The current 12-month window over the per-block monthly partials, held as
+# one (version, window) tuple that is only ever replaced whole
+@st.cache_resource
+def load_block_aggregates():
+    return {}
+
+
+@timings.timed
+def block_window(
+    partials: pd.DataFrame, version: tuple, end_month: pd.Period
+) -> BlockWindow:
+    # The window is shared across sessions and summed again from the monthly
+    # partials only when the dataset version or the month changes. Sessions
+    # racing here each read one consistent snapshot, and the last one to
+    # finish is kept.
+    aggregates = load_block_aggregates()
+    window_version, window = aggregates.get("latest", (None, None))
+    if window is None or window_version != version or window.end != end_month:
+        window = window_totals(partials, end_month)
+        aggregates["latest"] = (version, window)
+    return window
+
+
+# Derived results shared by every session, keyed on the dataset version and
+# the filter values behind their input instead of a hash of the rows
+@st.cache_resource
+def shared_cache() -> LRUCache:
+    return LRUCache(SHARED_CACHE_SIZE, SHARED_CACHE_BYTES)
+
+
+@timings.timed
+def collate_past_transactions(df: pd.DataFrame, key: tuple):
+    # Sorted month/price arrays with per-block offsets, aligned with the
+    # groupby order used in add_lat_long
+    return shared_cache().get_or_compute(
+        ("past_transactions",) + key, lambda: collate_transactions(df)
     )
 
-    return collapsed_df
+
+def stage_cache(stage: str) -> LRUCache:
+    # Each session keeps a small LRU per pipeline stage, keyed on the exact
+    # filter values that produced the stage's input
+    caches = st.session_state.setdefault("stage_caches", {})
+    return caches.setdefault(stage, LRUCache(STAGE_CACHE_SIZE))
+
+
+def render_timings():
+    background = load_timings()
+    with st.sidebar:
+        st.subheader("Timings")
+        st.dataframe(timings.to_records(), hide_index=True)
+        st.subheader("Background loads")
+        st.dataframe(background.to_records(), hide_index=True)
+        st.download_button(
+            "Export JSON",
+            json.dumps(
+                {"run": timings.to_records(), "background": background.to_records()},
+                indent=2,
+            ),
+            file_name="timings.json",
+            mime="application/json",
+        )
+        st.subheader("Caches")
+        caches = {"shared": shared_cache(), **st.session_state.get("stage_caches", {})}
+        st.dataframe(
+            [{"cache": name, **cache.stats()} for name, cache in caches.items()],
+            hide_index=True,
+        )
 
 
-@st.cache_data
-def intro():
-    st.title("How much is resale HDB?")
-    latest_date = pd.to_datetime(hdb_df["month"].max())
-    past_date = latest_date - pd.DateOffset(months=13)
+def intro(hdb_df: pd.DataFrame):
+    latest_date = hdb_df["month"].max()
+    past_date = latest_date - 13
     st.text(
         "Property data is from "
         + past_date.strftime("%b")
@@ -116,11 +227,22 @@ def intro():
     st.divider()
 
 
-def filters_type_town(hdb_df: pd.DataFrame):
+def select_rows(hdb_df: pd.DataFrame, column: str, selected: list, options: list):
+    if len(set(selected)) == len(options):  # everything selected, keep the view
+        return hdb_df
+    return hdb_df[hdb_df[column].isin(selected)]
+
+
+@timings.timed
+def filters_type_town(hdb_df: pd.DataFrame, key: tuple):
     # Filtering ############################################################################################
-    hdb_df["month_dt"] = pd.to_datetime(hdb_df["month"], format="%Y-%m")
-    cutoff_date = datetime.today() - relativedelta(months=12)
-    hdb_df = hdb_df[hdb_df["month_dt"] >= cutoff_date]
+    cutoff_month = pd.Period(datetime.today(), "M") - 11
+    key += (cutoff_month,)
+    # The shared frame is sorted by month, so this is a view of it, and the
+    # filters below only copy when they actually drop rows
+    hdb_df = stage_cache("recent").get_or_compute(
+        key, lambda: hdb_df.iloc[hdb_df["month"].searchsorted(cutoff_month) :]
+    )
 
     flat_types = sorted(hdb_df["flat_type"].unique())
     selected_flat_type = st.pills(
@@ -129,43 +251,35 @@ def filters_type_town(hdb_df: pd.DataFrame):
         default=flat_types,
         selection_mode="multi",
     )
-    hdb_df = hdb_df[(hdb_df["flat_type"].isin(selected_flat_type))]
+    key += (tuple(sorted(selected_flat_type)),)
+    hdb_df = stage_cache("flat_type").get_or_compute(
+        key, lambda: select_rows(hdb_df, "flat_type", selected_flat_type, flat_types)
+    )
     towns = sorted(hdb_df["town"].unique())
     selected_town = st.pills(
         "Desired Towns", options=towns, default=towns, selection_mode="multi"
     )
-    hdb_df = hdb_df[(hdb_df["town"].isin(selected_town))]
-    return hdb_df
+    key += (tuple(sorted(selected_town)),)
+    hdb_df = stage_cache("town").get_or_compute(
+        key, lambda: select_rows(hdb_df, "town", selected_town, towns)
+    )
+    return hdb_df, key
 
 
-def filters_price_bin(hdb_df: pd.DataFrame):
+@timings.timed
+def filters_price_bin(hdb_df: pd.DataFrame, key: tuple):
     # Show price distribution ##############################################################################
-    # Define bin width and threshold
-    bin_width = 50000
-
-    def bin_price(price: float):
-        return f"${int((price // bin_width) * bin_width):,}"
-
-    def extract_bin_midpoint(bin_str: str):
-        base = int(bin_str.replace("$", "").replace(",", ""))
-        return base + bin_width / 2
-
-    hdb_df["price_bin"] = hdb_df["resale_price"].apply(bin_price)
-    # Count entries per bin and sort (custom sort to put "≥ $1M" last)
-    price_data = hdb_df["price_bin"].value_counts().reset_index()
-    price_data.columns = ["price_bin", "count"]
-    price_data = price_data.sort_values(
-        by="price_bin", key=lambda col: col.map(extract_price_bin_value)
+    import altair as alt
+
+    bin_width = PRICE_BIN_WIDTH
+    price_data = stage_cache("price_histogram").get_or_compute(
+        key, lambda: price_histogram(hdb_df["resale_price"].to_numpy(), bin_width)
     )
-    # Create a sorted list of categories based on your mapped numeric values
     sorted_bins = price_data["price_bin"].tolist()
     st.markdown(
         "<label style='font-weight: 500; font-size: 0.875rem;'>Filter by Price Distribution</label>",
         unsafe_allow_html=True,
     )
-    price_data["mid_price"] = price_data["price_bin"].apply(extract_bin_midpoint)
-    # price_data["norm_price"] = (price_data["mid_price"] - min_val) / med_val
-    # price_data["color"] = price_data["norm_price"].apply(price_to_rgb)
     chart = (
         alt.Chart(price_data)
         .mark_bar()
@@ -197,14 +311,23 @@ def filters_price_bin(hdb_df: pd.DataFrame):
     return highlight_range
 
 
-def filters_lease_range(hdb_df: pd.DataFrame):
-    # Get min and max lease values
-    min_lease = int(hdb_df["lease_commence_date"].min())
-    max_lease = int(hdb_df["lease_commence_date"].max())
+def count_lease_years(hdb_df: pd.DataFrame):
     # Count occurrences of each lease year
     lease_counts = hdb_df["lease_commence_date"].value_counts().reset_index()
     lease_counts.columns = ["lease_years", "count"]
-    lease_counts = lease_counts.sort_values("lease_years")
+    return lease_counts.sort_values("lease_years")
+
+
+@timings.timed
+def filters_lease_range(hdb_df: pd.DataFrame, key: tuple):
+    import altair as alt
+
+    lease_counts = stage_cache("lease_counts").get_or_compute(
+        key, lambda: count_lease_years(hdb_df)
+    )
+    # Get min and max lease values
+    min_lease = int(lease_counts["lease_years"].min())
+    max_lease = int(lease_counts["lease_years"].max())
     # Display label
     st.markdown(
         "<label style='font-weight: 500; font-size: 0.875rem;'>Filter by Remaining Lease (Years)</label>",
@@ -245,107 +368,195 @@ def filters_lease_range(hdb_df: pd.DataFrame):
     return lease_range
 
 
-def add_lat_long(hdb_df: pd.DataFrame, df: pd.DataFrame):
-    past_prices_df = collate_past_transactions(hdb_df)
-    columns_to_remove = ["month", "month_dt", "price_bin"]
-    hdb_df = hdb_df.drop(columns=columns_to_remove)
-    hdb_df = hdb_df.groupby(
-        ["town", "flat_type", "block", "street_name"], as_index=False
-    ).mean()
+@timings.timed
+def filters_radius(geocodes: Geocodes):
+    st.markdown(
+        "<label style='font-weight: 500; font-size: 0.875rem;'>Filter by Distance from Block</label>",
+        unsafe_allow_html=True,
+    )
+    addresses = geocodes.block + " " + geocodes.street_name
+    radius_col1, radius_col2 = st.columns([3, 1])
+    with radius_col1:
+        centre = st.selectbox(
+            "Block",
+            options=np.argsort(addresses).tolist(),
+            format_func=lambda i: addresses[i],
+            index=None,
+            placeholder="Anywhere",
+            label_visibility="collapsed",
+        )
+    with radius_col2:
+        radius = st.number_input(
+            "Radius (m)",
+            min_value=100,
+            max_value=10000,
+            value=1000,
+            step=100,
+            label_visibility="collapsed",
+            disabled=centre is None,
+        )
+    if centre is None:
+        return None, ()
+    key = (centre, radius)
+    nearby_blocks = stage_cache("within_radius").get_or_compute(
+        key,
+        lambda: within_radius(
+            geocodes, geocodes.lat[centre], geocodes.lon[centre], radius
+        ),
+    )
+    return nearby_blocks, key
+
+
+@timings.timed
+def add_lat_long(
+    hdb_df: pd.DataFrame, window: BlockWindow, geocodes: Geocodes, key: tuple
+):
+    past_prices_df = collate_past_transactions(hdb_df, key)
+    # Block means come from the shared window's monthly sums; both they and
+    # the history are in sorted key order, restricted to the selected blocks
+    selected = window.totals.index.isin(
+        hdb_df["flat_type"].unique(), level="flat_type"
+    ) & window.totals.index.isin(hdb_df["town"].unique(), level="town")
+    hdb_df = block_means(window.totals[selected])
+    hdb_df["lease_commence_date"] = remaining_lease(hdb_df["lease_commence_date"])
+    hdb_df["history"] = np.arange(len(hdb_df))  # row into past_prices
     hdb_df = hdb_df.round().astype(
         {col: "int" for col in hdb_df.select_dtypes("float").columns}
     )
-    hdb_df = hdb_df.merge(  # merging for coordinates
-        df[["block", "street_name", "lat", "lon"]],
-        on=["block", "street_name"],
-        how="left",
-    )
-    hdb_df = hdb_df.merge(  # merging for past transactions
-        past_prices_df[["flat_type", "block", "street_name", "past_transactions"]],
-        on=["flat_type", "block", "street_name"],
-        how="left",
+    # Coordinates by hashed-key array lookup rather than a string merge
+    hdb_df["lat"], hdb_df["lon"] = lookup_coordinates(
+        geocodes, hdb_df["block"], hdb_df["street_name"]
     )
     # st.dataframe(hdb_df)
     # Clean up those missing coordinates
     missing_coords_df = hdb_df[hdb_df["lat"].isna() | hdb_df["lon"].isna()]
+    missing_coords_df = missing_coords_df.drop(columns="history")
     hdb_df = hdb_df.dropna(subset=["lat", "lon"])
-    return (hdb_df, missing_coords_df)
+    hdb_df["resale_price_formatted"] = hdb_df["resale_price"].map("{:,}".format)
+    return (hdb_df, missing_coords_df, past_prices_df)
 
 
+@timings.timed
 def colour_nodes(
     hdb_df: pd.DataFrame, min_price: float, med_price: float, max_price: float
 ):
-    def normalize_price(price, min_price, med_price, max_price):
-        if price <= med_price:
-            return 0.5 * (price - min_price) / (med_price - min_price)
-        else:
-            return 0.5 + 0.5 * (price - med_price) / (max_price - med_price)
-
-    hdb_df["norm_price"] = hdb_df["resale_price"].apply(
-        lambda x: normalize_price(x, min_price, med_price, max_price)
+    hdb_df["norm_price"] = normalise_prices(
+        hdb_df["resale_price"], min_price, med_price, max_price
     )
-    # hdb_df["norm_price"] = (hdb_df["resale_price"] - min_price) / med_price
-    hdb_df["color"] = hdb_df["norm_price"].apply(price_to_rgb)
-    hdb_df["color"] = hdb_df["color"].apply(rgb_str_to_pydeck_color)
+    # Separate uint8 channels, read by the layer as "[r, g, b]"
+    colours = price_colours(hdb_df["norm_price"])
+    hdb_df["r"], hdb_df["g"], hdb_df["b"] = colours[:, 0], colours[:, 1], colours[:, 2]
 
 
+@timings.timed
 def offset_coords(hdb_df: pd.DataFrame):
     # Step 1: Map each (block, street_name) to room_types
-    offsets = hdb_df.groupby(["block", "street_name"])["flat_type"].cumcount()
+    offsets = hdb_df.groupby(["block", "street_name"], observed=True)[
+        "flat_type"
+    ].cumcount()
     # Step 2: Create a mapping of (block, street_name, flat_type) → offset
     hdb_df["lat"] -= offsets.mul(0.000075)
-    hdb_df["resale_price_formatted"] = hdb_df["resale_price"].map("{:,}".format)
-    hdb_df["past_transactions_html"] = hdb_df["past_transactions"].map(
-        lambda txns: "<br>".join(
-            [f"{t['month']}: ${t['resale_price']:,.0f}" for t in txns]
-        )
-    )
     return hdb_df
 
 
-def render_map(hdb_df: pd.DataFrame):
-    hdb_df = hdb_df.drop(
-        columns=[
-            "floor_area_sqm",
-            "resale_price",
-            "highlight",
-            "norm_price",
-            "past_transactions",
-        ]
+def picked_block(hdb_df: pd.DataFrame, picked: dict):
+    match = (
+        (hdb_df["block"] == picked.get("block"))
+        & (hdb_df["street_name"] == picked.get("street_name"))
+        & (hdb_df["flat_type"] == picked.get("flat_type"))
     )
-    layer = pdk.Layer(
-        "ScatterplotLayer",
-        data=hdb_df,
-        get_position="[lon, lat]",
-        get_radius=10,
-        get_fill_color="color",
-        radiusMinPixels=1,  # minimum pixel size
-        radiusMaxPixels=10,  # maximum pixel size
-        radiusScale=1,  # scale factor (keep at 1 if using fixed pixels)
-        pickable=True,
+    if not match.any():
+        return None  # filtered out since it was picked
+    return hdb_df[match].iloc[0]
+
+
+def render_block_details(block: pd.Series, past_prices: TransactionHistory):
+    # Full history is rendered server-side for the picked block only
+    past_transactions_html = history_html(past_prices, [block["history"]])[0]
+    st.markdown(
+        f"""
+        <b>{block["town"]}</b><br>
+        <b>{block["block"]}</b> <b>{block["street_name"]}</b><br>
+        {block["flat_type"]} - ${block["resale_price_formatted"]}<br>
+        Remaining Lease - {block["lease_commence_date"]} years<br>
+        <hr style="margin:2px 0">
+        <b>Past Transactions:</b><br>{past_transactions_html}
+        """,
+        unsafe_allow_html=True,
     )
 
+
+@timings.timed
+def render_map(hdb_df: pd.DataFrame, past_prices: TransactionHistory):
+    import pydeck as pdk
+
     view_state = pdk.ViewState(
         latitude=hdb_df["lat"].mean(), longitude=hdb_df["lon"].mean(), zoom=11
     )
-    st.pydeck_chart(
-        pdk.Deck(
-            map_style="mapbox://styles/mapbox/dark-v10",
-            initial_view_state=view_state,
-            layers=[layer],
-            tooltip={
-                "html": """
+    aggregated = len(hdb_df) > MAX_SCATTER_POINTS
+    if aggregated:
+        # Too many points to draw one by one: ship positions and prices only
+        # and let the client bin them into hexagons coloured by mean price
+        layer = pdk.Layer(
+            "HexagonLayer",
+            id="blocks",
+            data=hdb_df[["lon", "lat", "resale_price"]].round({"lon": 6, "lat": 6}),
+            get_position="[lon, lat]",
+            get_color_weight="resale_price",
+            color_aggregation="MEAN",
+            color_range=[[0, 255, 0], [255, 255, 0], [255, 0, 0]],
+            radius=200,
+            pickable=True,
+        )
+        tooltip = {"html": "Mean price ${colorValue}"}
+    else:
+        # Row payload is kept to short fields; the transaction history is only
+        # rendered for the block that gets picked
+        layer = pdk.Layer(
+            "ScatterplotLayer",
+            id="blocks",
+            data=hdb_df[MAP_COLUMNS].round({"lon": 6, "lat": 6}),
+            get_position="[lon, lat]",
+            get_radius=10,
+            get_fill_color="[r, g, b]",
+            radiusMinPixels=1,  # minimum pixel size
+            radiusMaxPixels=10,  # maximum pixel size
+            radiusScale=1,  # scale factor (keep at 1 if using fixed pixels)
+            pickable=True,
+        )
+        tooltip = {
+            "html": """
             <b>{town}</b><br>
             <b>{block}</b> <b>{street_name}</b><br>
             {flat_type} - ${resale_price_formatted}<br>
             Remaining Lease - {lease_commence_date} years<br>
-            <hr style="margin:2px 0">
-            <b>Past Transactions:</b><br>{past_transactions_html}
+            <i>Click for past transactions</i>
         """,
-                "style": {"backgroundColor": "white", "color": "black"},
-            },
-        )
+            "style": {"backgroundColor": "white", "color": "black"},
+        }
+    event = st.pydeck_chart(
+        pdk.Deck(
+            map_style="mapbox://styles/mapbox/dark-v10",
+            initial_view_state=view_state,
+            layers=[layer],
+            tooltip=tooltip,
+        ),
+        on_select="rerun",
+        selection_mode="single-object",
+        key="map",
     )
+    if aggregated:
+        st.caption(
+            f"{len(hdb_df):,} blocks are grouped into hexagons coloured by mean price. Narrow your filters to see individual blocks."
+        )
+    else:
+        # The keyed selection outlives filter changes, so the pick is matched
+        # by its block rather than by its row number in this run's frame
+        picked = event.selection["objects"].get("blocks", [])
+        if picked:
+            block = picked_block(hdb_df, picked[0])
+            if block is not None:
+                render_block_details(block, past_prices)
     st.markdown(
         "<label style='font-weight: 500; font-size: 0.875rem;'>Price Legend</label>",
         unsafe_allow_html=True,
@@ -363,25 +574,55 @@ def render_map(hdb_df: pd.DataFrame):
 
 
 # Get Data #############################################################################################
-hdb_df = download_resale_hdb_dataset()
-df = pd.read_csv("postal_code_latlong_all_latlong.csv")
+start_loading()
+st.title("How much is resale HDB?")
+with st.spinner("Loading resale prices..."):
+    # One snapshot per run, even if a refresh swaps in a new one meanwhile
+    hdb_df, block_partials, data_version = wait_for("data")
+    geocodes = wait_for("geocodes")  # shared read-only across sessions
 
 # Header and such
-intro()
+intro(hdb_df)
 # Filters Flat Type and Town
-hdb_df = filters_type_town(hdb_df)
+# Stage keys start with the dataset version, so a refreshed dataset never
+# reuses results computed from the old one
+hdb_df, filter_key = filters_type_town(hdb_df, (data_version,))
 
 
 # More processing
-highlight_range = filters_price_bin(hdb_df)  # Filters by Price
-lease_range = filters_lease_range(hdb_df)
-hdb_df, missing_coords_df = add_lat_long(hdb_df, df)  # Adds coordinates
-
-# Set min max median of current filters
-hdb_df["highlight"] = hdb_df["resale_price"].between(
-    highlight_range[0], highlight_range[1]
-) & hdb_df["lease_commence_date"].between(lease_range[0], lease_range[1])
-hdb_df = hdb_df.loc[hdb_df["highlight"]]
+highlight_range = filters_price_bin(hdb_df, filter_key)  # Filters by Price
+lease_range = filters_lease_range(hdb_df, filter_key)
+nearby_blocks, radius_key = filters_radius(geocodes)
+# Adds coordinates
+hdb_df, missing_coords_df, past_prices = stage_cache("lat_long").get_or_compute(
+    filter_key,
+    lambda: add_lat_long(
+        hdb_df,
+        block_window(block_partials, data_version, pd.Period(today, "M")),
+        geocodes,
+        filter_key,
+    ),
+)
+if nearby_blocks is not None:
+    filter_key += radius_key
+    hdb_df = stage_cache("radius").get_or_compute(
+        filter_key,
+        lambda: hdb_df[
+            np.isin(
+                lookup_positions(geocodes, hdb_df["block"], hdb_df["street_name"]),
+                nearby_blocks,
+            )
+        ],
+    )
+
+# Set min max median of current filters. Cached stages above are shared
+# across reruns, so only the masked copy below gets new columns
+with timings.stage("highlight", rows_in=len(hdb_df)) as stage:
+    highlight = hdb_df["resale_price"].between(
+        highlight_range[0], highlight_range[1]
+    ) & hdb_df["lease_commence_date"].between(lease_range[0], lease_range[1])
+    hdb_df = hdb_df.loc[highlight]
+    stage["rows_out"] = len(hdb_df)
 min_price = hdb_df["resale_price"].min()
 med_price = hdb_df["resale_price"].median()
 max_price = hdb_df["resale_price"].max()
@@ -390,13 +631,11 @@ colour_nodes(hdb_df, min_price, med_price, max_price)
 hdb_df = offset_coords(hdb_df)
 # st.dataframe(hdb_df)
 
-if len(hdb_df) > 20000:
-    st.text(
-        "Your current filters have too much results. Please reduce your selections. "
-    )
+if hdb_df.empty:
+    st.text("No blocks match your current filters.")
 else:
     with st.spinner("Loading map... Please wait"):
-        render_map(hdb_df)
+        render_map(hdb_df, past_prices)
 
 if not missing_coords_df.empty:
     st.divider()
@@ -404,3 +643,6 @@ if not missing_coords_df.empty:
         "Transactions for the following blocks are new and are missing coordinate data. They will not show up on the map. "
     )
     st.dataframe(missing_coords_df)
+
+if timings.enabled:
+    render_timings()
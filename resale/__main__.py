@@ -0,0 +1,3 @@
+from resale.cli import main
+
+main()
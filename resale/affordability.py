@@ -0,0 +1,227 @@
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from functools import partial
+from resale.cpf import oa_contribution
+from resale.projection import CPF_OA_INTEREST, project_savings
+
+MSR = 0.3  # Mortgage Servicing Ratio, share of monthly income allowed for the loan
+# Defaults mirror the inputs in main.py; other scenario columns are required
+SCENARIO_DEFAULTS = {
+    "salary_raise": 3.0,
+    "raise_month": 1,
+    "bank_base_interest": 0.05,
+    "bank_bonus_interest": 2.5,
+    "bank_bonus_interest_cap": 100000,
+    "loan_duration": 25,
+    "loan_interest": 3.0,
+    "expected_grants": 40000,
+    "bank_usage": np.nan,  # NaN uses the whole projected balance
+    "cpf_usage": np.nan,
+}
+SCENARIO_COLUMNS = [
+    "age",
+    "birth_month",
+    "buying_age",
+    "salary",
+    "bank_bal",
+    "bank_bal_inc",
+    "cpf_bal",
+] + list(SCENARIO_DEFAULTS)
+RESULT_COLUMNS = [
+    "months",
+    "salary_final",
+    "cpf_increase_final",
+    "bank_balance",
+    "cpf_balance",
+    "total_balance",
+    "loan",
+    "max_property",
+]
+
+
+def calc_loan_based_on_msr_salary(payment: float, interest: float, years: int):
+    interest = interest / 100 / 12
+    total_payments = years * 12
+    loan = payment * (1 - (1 + interest) ** (-total_payments)) / interest
+    return loan
+
+
+def months_to_buy(start: date, age, birth_month, buying_age):
+    # Rows in the projection, from start up to the month of the buying birthday.
+    # Birthdays are taken to fall on the 1st, the page's date_input is finer.
+    had_birthday = start.month >= np.asarray(birth_month)
+    birth_year = start.year - np.asarray(age) - np.where(had_birthday, 0, 1)
+    buy_year = birth_year + np.asarray(buying_age)
+    return (buy_year - start.year) * 12 + np.asarray(birth_month) - start.month + 1
+
+
+def prepare_scenarios(scenarios: pd.DataFrame):
+    missing = [
+        col
+        for col in SCENARIO_COLUMNS
+        if col not in scenarios and col not in SCENARIO_DEFAULTS
+    ]
+    if missing:
+        raise ValueError(f"Scenarios are missing columns: {', '.join(missing)}")
+    scenarios = scenarios.copy()
+    for col, default in SCENARIO_DEFAULTS.items():
+        if col not in scenarios:
+            scenarios[col] = default
+    return scenarios
+
+
+def finance(
+    salary_final,
+    bank_balance,
+    cpf_balance,
+    loan_interest,
+    loan_duration,
+    expected_grants,
+    bank_usage,
+    cpf_usage,
+):
+    payment = MSR * salary_final
+    with np.errstate(divide="ignore", invalid="ignore"):
+        loan = calc_loan_based_on_msr_salary(payment, loan_interest, loan_duration)
+    loan = np.where(loan_interest == 0, payment * loan_duration * 12, loan)
+    bank_usage = np.where(np.isnan(bank_usage), bank_balance, bank_usage)
+    cpf_usage = np.where(np.isnan(cpf_usage), cpf_balance, cpf_usage)
+    bank_usage = np.minimum(bank_usage, bank_balance)
+    cpf_usage = np.minimum(cpf_usage, cpf_balance)
+    return loan, bank_usage + cpf_usage + loan + expected_grants
+
+
+def evaluate_scenario(scenario: dict, start: date | None = None):
+    # Scalar reference path: one scenario through project_savings
+    start = start or datetime.today()
+    scenario = {**SCENARIO_DEFAULTS, **scenario}
+    months = int(
+        months_to_buy(
+            start, scenario["age"], scenario["birth_month"], scenario["buying_age"]
+        )
+    )
+    proj_df = project_savings(
+        start,
+        months,
+        scenario["age"],
+        scenario["birth_month"],
+        scenario["salary"],
+        scenario["salary_raise"],
+        scenario["raise_month"],
+        scenario["bank_bal"],
+        scenario["bank_bal_inc"],
+        scenario["bank_base_interest"],
+        scenario["bank_bonus_interest"],
+        scenario["bank_bonus_interest_cap"],
+        scenario["cpf_bal"],
+    )
+    if proj_df.empty:
+        raise ValueError("Buying date is before the start of the projection")
+    last = proj_df.iloc[-1]
+    loan, max_property = finance(
+        last["Salary"],
+        last["Bank Balance"],
+        last["CPF(OA) Balance"],
+        np.float64(scenario["loan_interest"]),
+        scenario["loan_duration"],
+        scenario["expected_grants"],
+        np.float64(scenario["bank_usage"]),
+        np.float64(scenario["cpf_usage"]),
+    )
+    return {
+        "months": months,
+        "salary_final": last["Salary"],
+        "cpf_increase_final": last["CPF(OA) Increase"],
+        "bank_balance": last["Bank Balance"],
+        "cpf_balance": last["CPF(OA) Balance"],
+        "total_balance": last["Total balance"],
+        "loan": float(loan),
+        "max_property": float(max_property),
+    }
+
+
+def sweep_scenarios(scenarios: pd.DataFrame, start: date | None = None):
+    # Same maths as project_savings, stepping every scenario forward one month
+    # at a time. Scenarios are ordered by horizon (longest first) so the ones
+    # still running are always a prefix and each step works on plain slices.
+    start = start or datetime.today()
+    scenarios = prepare_scenarios(scenarios)
+    col = {c: scenarios[c].to_numpy(dtype=float) for c in SCENARIO_COLUMNS}
+    months = months_to_buy(start, col["age"], col["birth_month"], col["buying_age"])
+    months = months.astype(int)
+    if (months < 1).any():
+        raise ValueError("Buying date is before the start of the projection")
+    order = np.argsort(-months, kind="stable")
+    months_sorted = months[order]
+    c = {name: values[order] for name, values in col.items()}
+
+    age = c["age"].copy()
+    salary = c["salary"].copy()
+    bank_inc = c["bank_bal_inc"].copy()
+    bank = c["bank_bal"].copy()
+    cpf = c["cpf_bal"].copy()
+    cpf_inc = np.zeros(len(order))
+    pending_cpf = np.zeros(len(order))
+    raise_factor = 1 + c["salary_raise"] / 100
+    # Number of scenarios still running at each step
+    active_counts = np.searchsorted(-months_sorted, -np.arange(months.max()), "left")
+    for t, k in enumerate(active_counts):
+        month_idx = start.year * 12 + start.month - 1 + t
+        year, month = month_idx // 12, month_idx % 12 + 1
+        if year > start.year:
+            age[:k] += c["birth_month"][:k] == month
+        raised = c["raise_month"][:k] == month
+        salary[:k] = np.where(raised, salary[:k] * raise_factor[:k], salary[:k])
+        bank_inc[:k] = np.where(raised, bank_inc[:k] * raise_factor[:k], bank_inc[:k])
+        bank_interest = (
+            bank[:k] * c["bank_base_interest"][:k] / 12 / 100
+            + np.minimum(bank[:k], c["bank_bonus_interest_cap"][:k])
+            * c["bank_bonus_interest"][:k]
+            / 12
+            / 100
+        )
+        bank[:k] += bank_interest + bank_inc[:k]
+        if month == 1:
+            cpf[:k] += pending_cpf[:k]
+            pending_cpf[:k] = 0
+        pending_cpf[:k] += cpf[:k] * CPF_OA_INTEREST / 12 / 100
+        cpf_inc[:k] = oa_contribution(salary[:k], year, age[:k])
+        cpf[:k] += cpf_inc[:k]
+
+    loan, max_property = finance(
+        salary,
+        bank,
+        cpf,
+        c["loan_interest"],
+        c["loan_duration"],
+        c["expected_grants"],
+        c["bank_usage"],
+        c["cpf_usage"],
+    )
+    results = np.empty((len(order), len(RESULT_COLUMNS)))
+    results[order] = np.column_stack(
+        [months_sorted, salary, cpf_inc, bank, cpf, bank + cpf, loan, max_property]
+    )
+    result_df = pd.DataFrame(results, index=scenarios.index, columns=RESULT_COLUMNS)
+    result_df["months"] = result_df["months"].astype(int)
+    return result_df
+
+
+def sweep_scenarios_parallel(
+    scenarios: pd.DataFrame,
+    func=evaluate_scenario,
+    start: date | None = None,
+    max_workers: int | None = None,
+    chunksize: int = 256,
+):
+    # Fallback for scenario functions that cannot be broadcast, e.g. a custom
+    # per-row projection: rows are evaluated one by one across processes
+    start = start or datetime.today()
+    records = scenarios.to_dict("records")
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = list(
+            executor.map(partial(func, start=start), records, chunksize=chunksize)
+        )
+    return pd.DataFrame(results, index=scenarios.index)
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+HORIZONS = [1, 3, 5, 10, 15]
+
+
+def appreciation_ratios(pivot: pd.DataFrame, years: int = 16):
+    # Year-over-year price ratio per town; the first year has no previous one
+    recent = pivot.tail(years)
+    return (recent / recent.shift(1)).iloc[1:]
+
+
+def trailing_appreciation(ratios: pd.DataFrame, horizons: list = HORIZONS):
+    # Mean appreciation (%) over the last n years for every horizon at once:
+    # cumulative sums taken from the latest year backwards give each window
+    values = ratios.to_numpy(dtype=float)[::-1]
+    valid = ~np.isnan(values)
+    sums = np.cumsum(np.where(valid, values, 0), axis=0)
+    counts = np.cumsum(valid, axis=0)
+    means = np.full((len(horizons), values.shape[1]), np.nan)
+    if len(values):
+        rows = np.minimum(horizons, len(values)) - 1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            means = sums[rows] / counts[rows]
+    appreciation_df = pd.DataFrame(
+        (means - 1) * 100,
+        index=[f"{last_n} Years" for last_n in horizons],
+        columns=ratios.columns,
+    )
+    appreciation_df.index.name = "Appreciation Over Last"
+    return appreciation_df
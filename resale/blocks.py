@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from resale.history import HISTORY_KEYS
+from resale.schema import concat_normalised
+
+BLOCK_KEYS = HISTORY_KEYS
+SUM_DTYPES = {
+    "floor_area_sqm": np.float64,
+    "lease_commence_date": np.int64,
+    "resale_price": np.int64,
+}
+SUM_COLUMNS = list(SUM_DTYPES)
+WINDOW_MONTHS = 12
+
+
+@dataclass(frozen=True)
+class BlockWindow:
+    # Count and column sums per block over months start..end inclusive,
+    # indexed by BLOCK_KEYS. Means are sums / count, so the window is summed
+    # from the monthly partials without touching raw rows.
+    start: pd.Period
+    end: pd.Period
+    totals: pd.DataFrame
+
+
+def build_partials(df: pd.DataFrame):
+    # One row per (month, block) with the count and sums for that month.
+    # Sums are widened first, int16 lease years overflow within a few rows
+    sum_df = df[["month"] + BLOCK_KEYS].copy()
+    for col, dtype in SUM_DTYPES.items():
+        sum_df[col] = df[col].astype(dtype)
+    grouped = sum_df.groupby(["month"] + BLOCK_KEYS, observed=True)
+    partial_df = grouped[SUM_COLUMNS].sum()
+    partial_df.insert(0, "count", grouped.size().astype(np.int64))
+    return partial_df.reset_index()
+
+
+def merge_partials(partials: list):
+    # Datasets can share a boundary month, so partials are summed per key
+    partial_df = concat_normalised(partials)
+    partial_df = partial_df.groupby(["month"] + BLOCK_KEYS, observed=True).sum()
+    return partial_df.reset_index()
+
+
+def month_totals(partial_df: pd.DataFrame, start: pd.Period, end: pd.Period):
+    # Partials are grouped with month first, so they are in month order and
+    # the range is one slice rather than a mask over every row
+    first, last = partial_df["month"].array.searchsorted([start, end + 1])
+    rows = partial_df.iloc[first:last]
+    return rows.groupby(BLOCK_KEYS, observed=True)[["count"] + SUM_COLUMNS].sum()
+
+
+def window_totals(
+    partial_df: pd.DataFrame, end: pd.Period, months: int = WINDOW_MONTHS
+):
+    start = end - (months - 1)
+    return BlockWindow(start, end, month_totals(partial_df, start, end))
+
+
+def block_means(totals: pd.DataFrame):
+    # Same layout as df.groupby(BLOCK_KEYS, as_index=False, observed=True).mean()
+    mean_df = totals[SUM_COLUMNS].div(totals["count"], axis=0)
+    return mean_df.reset_index()
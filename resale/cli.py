@@ -0,0 +1,139 @@
+import argparse
+import os
+import sys
+import pandas as pd
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from datetime import date, datetime
+from functools import partial
+from pathlib import Path
+from resale.affordability import sweep_scenarios
+from resale.cube import CUBE_COLUMNS, build_price_cube
+from resale.ranking import rank_scenarios, town_outlook
+from resale.store import STORE_DIR, load_resale_dataset, load_resale_sketches
+
+CHUNK_SIZE = 1000
+# Chunks submitted ahead of the one being written, per worker
+CHUNKS_PER_WORKER = 2
+
+# Set once per worker process by the pool initializer
+_outlook = None
+
+
+def read_scenarios(path: str, chunksize: int = CHUNK_SIZE):
+    # Scenario rows from CSV, JSON Lines or a JSON array, in chunks. The row
+    # number (or an "id" column) identifies each scenario in the output.
+    source = sys.stdin if path == "-" else path
+    suffix = Path(path).suffix.lower()
+    if suffix == ".json":
+        chunks = iter([pd.read_json(source, orient="records")])
+    elif suffix == ".jsonl":
+        chunks = pd.read_json(source, lines=True, chunksize=chunksize)
+    else:
+        chunks = pd.read_csv(source, chunksize=chunksize)
+    for chunk in chunks:
+        if "id" in chunk:
+            chunk = chunk.set_index("id")
+        chunk.index.name = "scenario"
+        yield chunk
+
+
+def write_chunks(chunks, path: str):
+    # Written chunk by chunk as results come back from the pool
+    first = True
+    # nullcontext leaves stdout open once the chunks are written
+    with nullcontext(sys.stdout) if path == "-" else open(path, "w", newline="") as out:
+        for chunk in chunks:
+            if Path(path).suffix.lower() == ".jsonl":
+                # Only a named index (the scenario id) is written as a field
+                records = chunk.reset_index() if chunk.index.name else chunk
+                records.to_json(out, orient="records", lines=True)
+            else:
+                chunk.to_csv(out, header=first, index=chunk.index.name is not None)
+            first = False
+
+
+def load_town_outlook(args: argparse.Namespace):
+    df = load_resale_dataset(store_dir=args.store_dir, columns=CUBE_COLUMNS)
+    cube = build_price_cube(df, load_resale_sketches(store_dir=args.store_dir))
+    return town_outlook(
+        cube,
+        args.flat_type,
+        towns=args.towns,
+        agg=args.agg,
+        appreciation=f"{args.appreciation} Years",
+        start_year=args.start.year,
+    )
+
+
+def init_worker(outlook: pd.DataFrame):
+    global _outlook
+    _outlook = outlook
+
+
+def evaluate_chunk(chunk: pd.DataFrame, start: date, rank: bool = False):
+    results = sweep_scenarios(chunk, start)
+    if rank:
+        return rank_scenarios(_outlook, results, start)
+    return pd.concat([chunk, results], axis=1)
+
+
+def run_scenarios(
+    chunks,
+    start: date,
+    outlook: pd.DataFrame | None = None,
+    max_workers: int | None = None,
+):
+    # Chunks are evaluated in a process pool, each worker holding the price
+    # outlook from the initializer, and yielded back in input order. Only a
+    # few chunks per worker are in flight, so the input is read as the
+    # output is written instead of all at once as executor.map would.
+    func = partial(evaluate_chunk, start=start, rank=outlook is not None)
+    max_workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(
+        max_workers=max_workers, initializer=init_worker, initargs=(outlook,)
+    ) as executor:
+        pending = deque()
+        for chunk in chunks:
+            if len(pending) >= CHUNKS_PER_WORKER * max_workers:
+                yield pending.popleft().result()
+            pending.append(executor.submit(func, chunk))
+        while pending:
+            yield pending.popleft().result()
+
+
+def parse_args(argv: list | None = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m resale",
+        description="Batch affordability projections and town rankings.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    project = commands.add_parser("project", help="project savings and budgets")
+    rank = commands.add_parser("rank", help="rank towns against each budget")
+    for command in (project, rank):
+        command.add_argument("scenarios", help="CSV, JSON or JSON Lines, - for stdin")
+        command.add_argument("-o", "--output", default="-", help="CSV or JSON Lines")
+        command.add_argument(
+            "--start",
+            type=lambda value: datetime.strptime(value, "%Y-%m"),
+            default=datetime.today(),
+            help="first projected month as YYYY-MM (default: this month)",
+        )
+        command.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+        command.add_argument("--workers", type=int, default=None)
+    rank.add_argument("--flat-type", required=True)
+    rank.add_argument("--towns", nargs="+", default=None)
+    rank.add_argument(
+        "--agg", default="median", choices=["median", "mean", "p25", "p75", "p90"]
+    )
+    rank.add_argument("--appreciation", type=int, default=5, choices=[1, 3, 5, 10, 15])
+    rank.add_argument("--store-dir", type=Path, default=STORE_DIR)
+    return parser.parse_args(argv)
+
+
+def main(argv: list | None = None):
+    args = parse_args(argv)
+    outlook = load_town_outlook(args) if args.command == "rank" else None
+    chunks = read_scenarios(args.scenarios, args.chunksize)
+    write_chunks(run_scenarios(chunks, args.start, outlook, args.workers), args.output)
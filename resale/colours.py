@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+PRICE_BIN_WIDTH = 50000
+MIDPOINT = 0.5  # set this to 0.66 or 0.75 as needed
+
+
+def normalise_prices(prices, min_price: float, med_price: float, max_price: float):
+    # 0 at min_price, 0.5 at the median and 1 at max_price, linear in between
+    prices = np.asarray(prices, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lower = 0.5 * (prices - min_price) / (med_price - min_price)
+        upper = 0.5 + 0.5 * (prices - med_price) / (max_price - med_price)
+    # A flat range has nothing to spread over, so it sits on the midpoint
+    return np.nan_to_num(np.where(prices <= med_price, lower, upper), nan=0.5)
+
+
+def price_colours(norm_prices, midpoint: float = MIDPOINT):
+    # Piecewise-linear ramp, green -> yellow -> red, as an (n, 3) uint8 array
+    norm_prices = np.clip(np.asarray(norm_prices, dtype=float), 0, 1)
+    below = norm_prices < midpoint
+    colours = np.zeros((len(norm_prices), 3), dtype=np.uint8)
+    colours[:, 0] = np.where(below, norm_prices / midpoint * 255, 255)
+    colours[:, 1] = np.where(below, 255, (1 - norm_prices) / (1 - midpoint) * 255)
+    return colours
+
+
+def price_histogram(prices, bin_width: int = PRICE_BIN_WIDTH):
+    # Counts per bin_width price band, in price order, with labels formatted
+    # only for the bands that have transactions
+    bins = np.asarray(prices) // bin_width
+    if not len(bins):
+        return pd.DataFrame(columns=["price_bin", "count", "mid_price"])
+    first = int(bins.min())
+    counts = np.bincount((bins - first).astype(np.int64))
+    occupied = np.flatnonzero(counts)
+    lower = (first + occupied) * bin_width
+    return pd.DataFrame(
+        {
+            "price_bin": [f"${int(price):,}" for price in lower],
+            "count": counts[occupied],
+            "mid_price": lower + bin_width / 2,
+        }
+    )
@@ -0,0 +1,34 @@
+import numpy as np
+
+# Rules are stored as lookup tables so new years can be added as data. Each
+# table applies from its year onwards; years before the first row use it too.
+# The 0 row keeps the 8000 ceiling the rules applied before 2025.
+WAGE_CEILING_YEARS = np.array([0, 2025, 2026])
+WAGE_CEILINGS = np.array([8000, 7400, 8000])
+CONTRIBUTION_RATE = 0.37
+# Inclusive upper age of each band, older members fall in the last column
+AGE_BAND_LIMITS = np.array([35, 45, 50, 55, 60, 65, 70])
+OA_ALLOCATION_YEARS = np.array([2025])
+OA_ALLOCATIONS = np.array(
+    [[0.6217, 0.5677, 0.5136, 0.4055, 0.3694, 0.149, 0.0607, 0.08]]
+)
+
+
+def year_row(table_years: np.ndarray, year):
+    row = np.searchsorted(table_years, year, side="right") - 1
+    return np.clip(row, 0, len(table_years) - 1)
+
+
+def age_band(age):
+    return np.searchsorted(AGE_BAND_LIMITS, age, side="left")
+
+
+def oa_contribution(salary, year, age):
+    # Broadcasts over arrays of salaries, years and ages
+    ceiling = WAGE_CEILINGS[year_row(WAGE_CEILING_YEARS, year)]
+    portion_to_oa = OA_ALLOCATIONS[year_row(OA_ALLOCATION_YEARS, year), age_band(age)]
+    return np.minimum(salary, ceiling) * CONTRIBUTION_RATE * portion_to_oa
+
+
+def calc_cpf_oa_increase(salary: int, year: int, age: int):
+    return float(oa_contribution(salary, year, age))
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from resale.sketch import build_sketches, merge_sketches, sketch_quantiles
+
+CUBE_KEYS = ["year", "town", "flat_type"]
+CUBE_COLUMNS = ["month", "town", "flat_type", "resale_price"]  # read from the store
+
+
+@dataclass
+class PriceCube:
+    # count/sum/mean/median per (year, town, flat_type), approximate p25/p50/
+    # p75/p90 from the merged sketches, and where each cell's prices start in
+    # `prices`
+    cells: pd.DataFrame
+    # Prices sorted within each cell, cells laid out in the order of `cells`
+    prices: np.ndarray
+
+
+def build_price_cube(df: pd.DataFrame, sketches: pd.DataFrame | None = None):
+    keys = pd.DataFrame(
+        {
+            "year": df["month"].dt.year.to_numpy(),
+            "town": df["town"].astype(str).to_numpy(),
+            "flat_type": df["flat_type"].astype(str).to_numpy(),
+        }
+    )
+    grouped = keys.groupby(CUBE_KEYS, sort=True)
+    cell_ids = grouped.ngroup().to_numpy()
+    prices = df["resale_price"].to_numpy()
+    order = np.lexsort((prices, cell_ids))
+    prices = prices[order]
+
+    counts = np.bincount(cell_ids, minlength=grouped.ngroups)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    sums = np.add.reduceat(prices.astype(np.int64), starts) if len(prices) else counts
+    # Exact medians straight from the sorted cell slices
+    lower = prices[starts + (counts - 1) // 2]
+    upper = prices[starts + counts // 2]
+    cells = pd.DataFrame(
+        {
+            "count": counts,
+            "sum": sums,
+            "mean": sums / counts,
+            "median": (lower.astype(float) + upper) / 2,
+            "start": starts,
+        },
+        index=grouped.size().index,
+    )
+
+    # Monthly sketches roll up into the yearly cells by adding bin counts
+    if sketches is None:
+        sketches = build_sketches(df)
+    sketches = sketches.assign(year=sketches["month"].dt.year)
+    yearly = merge_sketches([sketches.drop(columns="month")], CUBE_KEYS)
+    quantiles = sketch_quantiles(yearly, CUBE_KEYS).reset_index()
+    quantiles = quantiles.astype({"town": str, "flat_type": str})
+    cells = cells.join(quantiles.set_index(CUBE_KEYS))
+    return PriceCube(cells, prices)
+
+
+def cube_flat_types(cube: PriceCube):
+    return sorted(cube.cells.index.unique("flat_type"))
+
+
+def cube_towns(cube: PriceCube, flat_type: str):
+    return sorted(cube.cells.xs(flat_type, level="flat_type").index.unique("town"))
+
+
+def cube_pivot(cube: PriceCube, flat_type: str, towns: list, agg: str = "median"):
+    # Same table as pivot_table(values="resale_price", index="year",
+    # columns="town", aggfunc=agg) on the matching transactions. agg may also
+    # be one of the sketch quantiles, e.g. "p90".
+    cells = cube.cells.xs(flat_type, level="flat_type")
+    cells = cells[cells.index.get_level_values("town").isin(towns)]
+    pivot = cells[agg].unstack("town")
+    pivot.index.name = "Year"
+    pivot.columns = pivot.columns.astype(str)
+    return pivot
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+SIMULATION_PATHS = 10_000
+SIMULATION_SEED = 0  # fixed, so reruns show the same bands
+BANDS = {"P10": 10, "P50": 50, "P90": 90}
+
+
+def project_prices(
+    last_prices: pd.Series, rates: pd.Series | pd.DataFrame, start_year: int, years: int
+):
+    # Compound last year's prices by a constant annual rate (%) per town, as
+    # price * (1 + rate) ** offset for every year at once. A DataFrame of rates
+    # (one row per appreciation choice) projects all choices in the same
+    # broadcast under a (choice, Year) index. Shorter horizons are head()
+    # slices of a longer projection.
+    offsets = np.arange(years + 1)
+    years_index = pd.Index(start_year + offsets, name="Year")
+    if isinstance(rates, pd.Series):
+        rates = rates.reindex(last_prices.index)
+    else:
+        rates = rates.reindex(columns=last_prices.index)
+    rate_values = np.atleast_2d(rates.to_numpy(dtype=float))
+    growth = (1 + rate_values[:, None, :] / 100) ** offsets[None, :, None]
+    prices = last_prices.to_numpy(dtype=float) * growth
+    if isinstance(rates, pd.Series):
+        return pd.DataFrame(prices[0], index=years_index, columns=last_prices.index)
+    index = pd.MultiIndex.from_product(
+        [rates.index, years_index], names=[rates.index.name, "Year"]
+    )
+    return pd.DataFrame(
+        prices.reshape(-1, prices.shape[-1]), index=index, columns=last_prices.index
+    )
+
+
+def simulate_growth(
+    ratios: pd.DataFrame,
+    towns: pd.Index,
+    years: int,
+    paths: int = SIMULATION_PATHS,
+    seed: int = SIMULATION_SEED,
+):
+    # Bootstrapped growth since last year as a (towns, years + 1, paths)
+    # float32 array, paths last so the percentiles read contiguous memory.
+    # Every simulated year draws one of the town's own historical
+    # year-over-year ratios, and the draws are compounded along the years.
+    ratios = ratios.reindex(columns=towns).to_numpy(dtype=np.float32)
+    table = np.sort(ratios, axis=0).T  # each town's missing years sort last
+    counts = (~np.isnan(table)).sum(axis=1)
+    # A town without any ratio only ever draws the padding, a flat 1
+    padding = np.ones((len(towns), 1), dtype=np.float32)
+    table = np.hstack([np.nan_to_num(table, nan=1), padding])
+    rng = np.random.default_rng(seed)
+    draws = rng.random((len(towns), years, paths), dtype=np.float32)
+    draws *= counts[:, None, None]
+    rows = draws.astype(np.int32)
+    del draws
+    # float32 rounding can land a draw on the count itself
+    np.minimum(rows, np.maximum(counts - 1, 0)[:, None, None], out=rows)
+    # Row numbers into the flattened (town, ratio) table
+    rows += (np.arange(len(towns), dtype=np.int32) * table.shape[1])[:, None, None]
+    growth = np.empty((len(towns), years + 1, paths), dtype=np.float32)
+    growth[:, 0] = 1
+    np.take(table.ravel(), rows, out=growth[:, 1:])
+    np.cumprod(growth, axis=1, out=growth)
+    return growth
+
+
+def price_bands(
+    last_prices: pd.Series,
+    growth: np.ndarray,
+    start_year: int,
+    bands: dict = BANDS,
+):
+    # Percentiles of the simulated prices per year and town, under a
+    # (Band, Year) index like the multi-rate output of project_prices.
+    # Scaling by last year's price keeps the order, so it is applied to the
+    # percentiles rather than to every path.
+    quantiles = np.percentile(growth, list(bands.values()), axis=-1)
+    prices = quantiles.transpose(0, 2, 1) * last_prices.to_numpy(dtype=float)
+    years_index = pd.Index(start_year + np.arange(growth.shape[1]), name="Year")
+    index = pd.MultiIndex.from_product(
+        [list(bands), years_index], names=["Band", "Year"]
+    )
+    return pd.DataFrame(
+        prices.reshape(-1, prices.shape[-1]), index=index, columns=last_prices.index
+    )
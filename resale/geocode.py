@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+
+GEOCODE_CSV = "postal_code_latlong_all_latlong.csv"
+EARTH_RADIUS_M = 6371000
+GRID_CELL_M = 250
+
+
+@dataclass
+class Geocodes:
+    # One entry per (block, street_name), sorted by its hashed key
+    keys: np.ndarray
+    block: np.ndarray
+    street_name: np.ndarray
+    lat: np.ndarray
+    lon: np.ndarray
+    # Uniform grid over an equirectangular projection: entries sorted by cell,
+    # `cell_ids` holds each occupied cell and `cell_starts` where it begins
+    origin: tuple
+    grid_order: np.ndarray
+    cell_ids: np.ndarray
+    cell_starts: np.ndarray
+
+
+def address_keys(block: pd.Series, street_name: pd.Series):
+    addresses = pd.DataFrame(
+        {"block": block.astype(str), "street_name": street_name.astype(str)}
+    )
+    return pd.util.hash_pandas_object(addresses, index=False).to_numpy()
+
+
+def project(lat, lon, origin: tuple):
+    # Metres east/north of origin; plenty accurate across Singapore
+    lat0, lon0 = origin
+    x = np.radians(np.asarray(lon) - lon0) * np.cos(np.radians(lat0)) * EARTH_RADIUS_M
+    y = np.radians(np.asarray(lat) - lat0) * EARTH_RADIUS_M
+    return x, y
+
+
+def grid_cells(x, y):
+    # Pack (column, row) into one integer, rows offset to stay non-negative
+    col = np.floor(np.asarray(x) / GRID_CELL_M).astype(np.int64)
+    row = np.floor(np.asarray(y) / GRID_CELL_M).astype(np.int64)
+    return col * 2**20 + row + 2**19
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+def load_geocodes(path: str = GEOCODE_CSV):
+    df = pd.read_csv(
+        path,
+        usecols=["block", "street_name", "lat", "lon"],
+        dtype={"block": str, "street_name": str},
+    )
+    keys = address_keys(df["block"], df["street_name"])
+    order = np.argsort(keys, kind="stable")
+    keys, df = keys[order], df.iloc[order]
+    unique = np.r_[True, keys[1:] != keys[:-1]]  # keep the first of any duplicates
+    keys, df = keys[unique], df[unique]
+
+    lat = df["lat"].to_numpy()
+    lon = df["lon"].to_numpy()
+    origin = (float(lat.min()), float(lon.min()))
+    cells = grid_cells(*project(lat, lon, origin))
+    grid_order = np.argsort(cells, kind="stable")
+    cell_ids, cell_starts = np.unique(cells[grid_order], return_index=True)
+    return Geocodes(
+        keys,
+        df["block"].to_numpy(dtype=object),
+        df["street_name"].to_numpy(dtype=object),
+        lat,
+        lon,
+        origin,
+        grid_order,
+        cell_ids,
+        np.append(cell_starts, len(cells)),
+    )
+
+
+def lookup_positions(geocodes: Geocodes, block: pd.Series, street_name: pd.Series):
+    # Index into the geocode arrays for each address, -1 where unknown
+    keys = address_keys(block, street_name)
+    positions = np.searchsorted(geocodes.keys, keys)
+    positions = np.minimum(positions, len(geocodes.keys) - 1)
+    return np.where(geocodes.keys[positions] == keys, positions, -1)
+
+
+def lookup_coordinates(geocodes: Geocodes, block: pd.Series, street_name: pd.Series):
+    positions = lookup_positions(geocodes, block, street_name)
+    found = positions >= 0
+    lat = np.where(found, geocodes.lat[positions], np.nan)
+    lon = np.where(found, geocodes.lon[positions], np.nan)
+    return lat, lon
+
+
+def within_radius(geocodes: Geocodes, lat: float, lon: float, radius_m: float):
+    # Positions of every geocoded block within radius_m metres of (lat, lon)
+    x, y = project(lat, lon, geocodes.origin)
+    reach = int(np.ceil(radius_m / GRID_CELL_M))
+    offsets = np.arange(-reach, reach + 1) * GRID_CELL_M
+    cells = grid_cells(*np.meshgrid(x + offsets, y + offsets)).ravel()
+    slots = np.searchsorted(geocodes.cell_ids, cells[np.isin(cells, geocodes.cell_ids)])
+    candidates = np.concatenate(
+        [np.empty(0, dtype=np.int64)]
+        + [
+            geocodes.grid_order[start:end]
+            for start, end in zip(
+                geocodes.cell_starts[slots], geocodes.cell_starts[slots + 1]
+            )
+        ]
+    )
+    distances = haversine_m(
+        lat, lon, geocodes.lat[candidates], geocodes.lon[candidates]
+    )
+    return candidates[distances <= radius_m]
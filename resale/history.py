@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+
+HISTORY_KEYS = ["town", "flat_type", "block", "street_name"]
+
+
+@dataclass
+class TransactionHistory:
+    # CSR layout: group i's transactions, latest first, are
+    # months[offsets[i]:offsets[i + 1]] and prices[offsets[i]:offsets[i + 1]].
+    # Groups follow df.groupby(HISTORY_KEYS, observed=True) order.
+    keys: pd.DataFrame
+    months: np.ndarray  # monthly period ordinals
+    prices: np.ndarray
+    offsets: np.ndarray
+
+
+def collate_transactions(df: pd.DataFrame):
+    grouped = df.groupby(HISTORY_KEYS, observed=True)
+    group_ids = grouped.ngroup().to_numpy()
+    months = df["month"].array.asi8
+    order = np.lexsort((-months, group_ids))
+    counts = np.bincount(group_ids, minlength=grouped.ngroups)
+    return TransactionHistory(
+        grouped.size().index.to_frame(index=False),
+        months[order],
+        df["resale_price"].to_numpy()[order],
+        np.concatenate([[0], np.cumsum(counts)]),
+    )
+
+
+def history_html(history: TransactionHistory, groups: np.ndarray):
+    # "<br>"-joined "YYYY-MM: $price" lines for the requested groups only.
+    # Each distinct month and price is formatted once, then the lines are
+    # gathered and concatenated per group with np.add.reduceat.
+    groups = np.asarray(groups, dtype=np.int64)
+    if not len(groups):
+        return np.empty(0, dtype=object)
+    starts = history.offsets[groups]
+    lengths = history.offsets[groups + 1] - starts
+    line_starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    rows = np.repeat(starts - line_starts, lengths) + np.arange(lengths.sum())
+
+    months, month_idx = np.unique(history.months[rows], return_inverse=True)
+    month_labels = pd.PeriodIndex.from_ordinals(months, freq="M").strftime("%Y-%m")
+    prices, price_idx = np.unique(history.prices[rows], return_inverse=True)
+    price_labels = np.array([f": ${price:,.0f}" for price in prices], dtype=object)
+
+    separators = np.full(len(rows), "<br>", dtype=object)
+    separators[line_starts] = ""
+    lines = (
+        separators
+        + np.asarray(month_labels, dtype=object)[month_idx]
+        + price_labels[price_idx]
+    )
+    return np.add.reduceat(lines, line_starts)
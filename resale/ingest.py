@@ -0,0 +1,84 @@
+import pandas as pd
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+API_URL = "https://api-open.data.gov.sg/v1/public/api/datasets/"
+DATASETS = [  # These datasets are from 'Resale Flat Prices' https://data.gov.sg/collections/189/view
+    "d_ebc5ab87086db484f88045b47411ebc5",
+    "d_43f493c6c50d54243cc1eab0df142d6a",
+    "d_2d5ff9ea31397b66239f245f57751537",
+    "d_ea9ed51da2787afaf8e51f827c304208",
+    "d_8b84c4ee58e3cfc0ece0d773c8ca6abc",
+]
+LATEST_DATASET = DATASETS[-1]  # the only dataset that still receives new months
+
+
+class IngestError(Exception):
+    def __init__(self, errors: dict):
+        self.errors = errors
+        super().__init__(
+            "Failed to fetch "
+            + ", ".join(f"{dataset} ({error})" for dataset, error in errors.items())
+        )
+
+
+def make_session(pool_size: int = len(DATASETS)):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch_dataset(
+    session: requests.Session, dataset: str, api_url: str = API_URL, timeout: int = 60
+):
+    response = session.get(
+        api_url + dataset + "/initiate-download",
+        headers={"Content-Type": "application/json"},
+        timeout=timeout,
+    )
+    response.raise_for_status()
+    url = response.json().get("data").get("url")
+    # Stream the body straight into the parser instead of decoding it to a str first
+    with session.get(url, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        response.raw.decode_content = True  # undo gzip/deflate transfer encoding
+        return pd.read_csv(response.raw, encoding="utf-8")
+
+
+def fetch_datasets(
+    datasets: list = DATASETS,
+    fetched: dict | None = None,
+    api_url: str = API_URL,
+    max_workers: int | None = None,
+):
+    # Datasets already in `fetched` are skipped, so retrying with the same dict
+    # after an IngestError resumes with only the ones that failed
+    fetched = {} if fetched is None else fetched
+    pending = [dataset for dataset in datasets if dataset not in fetched]
+    if not pending:
+        return fetched
+    max_workers = max_workers or len(pending)
+    errors = {}
+    with make_session(max_workers) as session:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                dataset: executor.submit(fetch_dataset, session, dataset, api_url)
+                for dataset in pending
+            }
+            for dataset, future in futures.items():
+                try:
+                    fetched[dataset] = future.result()
+                except Exception as e:
+                    errors[dataset] = e
+    if errors:
+        raise IngestError(errors)
+    return fetched
+
+
+def download_datasets(datasets: list = DATASETS, api_url: str = API_URL):
+    fetched = fetch_datasets(datasets, api_url=api_url)
+    # Concatenate in the listed order so rows stay chronological
+    return pd.concat([fetched[dataset] for dataset in datasets], ignore_index=True)
@@ -0,0 +1,88 @@
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
+from typing import Callable, Hashable
+
+STAGE_CACHE_SIZE = 8
+SHARED_CACHE_SIZE = 64
+SHARED_CACHE_BYTES = 256 * 2**20
+
+
+def nbytes(value):
+    # Approximate size of frames, arrays and tuples/dataclasses of them
+    if hasattr(value, "memory_usage") and hasattr(value, "columns"):
+        return int(value.memory_usage(index=True).sum())
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    if isinstance(value, (tuple, list)):
+        return sum(nbytes(item) for item in value)
+    if is_dataclass(value):
+        return sum(nbytes(getattr(value, field.name)) for field in fields(value))
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    # Keys are built by the caller from the dataset version and the filter
+    # values behind the input, so frames are never hashed. Safe to share
+    # between sessions; two sessions missing the same key may both compute it.
+    def __init__(self, maxsize: int = STAGE_CACHE_SIZE, maxbytes: int | None = None):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.currbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable):
+        return key in self._entries
+
+    def get_or_compute(self, key: Hashable, compute: Callable):
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+        value = compute()
+        size = nbytes(value) if self.maxbytes is not None else 0
+        if self.maxbytes is not None and size > self.maxbytes:
+            return value  # would evict everything else, so it is not kept
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = value
+            self._sizes[key] = size
+            self.currbytes += size
+            # Least recently used entries go first once over either limit
+            while len(self._entries) > self.maxsize or (
+                self.maxbytes is not None and self.currbytes > self.maxbytes
+            ):
+                self._discard(next(iter(self._entries)))
+                self.evictions += 1
+        return value
+
+    def _discard(self, key: Hashable):
+        del self._entries[key]
+        self.currbytes -= self._sizes.pop(key)
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "bytes": self.currbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.currbytes = 0
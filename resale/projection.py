@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+from datetime import date
+from resale.cpf import oa_contribution
+
+COLUMNS = [
+    "Salary",
+    "Bank Increase",
+    "Bank Interest",
+    "Bank Balance",
+    "CPF(OA) Increase",
+    "CPF(OA) Interest",
+    "CPF(OA) Balance",
+    "Total balance",
+]
+CPF_OA_INTEREST = 2.5
+
+
+def project_savings(
+    start: date,
+    months: int,
+    age: int,
+    birth_month: int,
+    salary: float,
+    salary_raise: float,
+    raise_month: int,
+    bank_bal: float,
+    bank_bal_inc: float,
+    bank_base_interest: float,
+    bank_bonus_interest: float,
+    bank_bonus_interest_cap: float,
+    cpf_bal: float,
+    cpf_interest: float = CPF_OA_INTEREST,
+):
+    n = max(months, 0)
+    month_idx = start.year * 12 + start.month - 1 + np.arange(n)
+    years = month_idx // 12
+    month_of_year = month_idx % 12 + 1
+
+    # Calendar-driven columns need no state, so they are computed up front
+    ages = age + np.cumsum((years > start.year) & (month_of_year == birth_month))
+    growth = (1 + salary_raise / 100) ** np.cumsum(month_of_year == raise_month)
+    salaries = salary * growth
+    bank_incs = bank_bal_inc * growth
+    cpf_incs = oa_contribution(salaries, years, ages)
+
+    # Balances compound on the previous month, so fill them in a single pass
+    bank_interests = np.empty(n)
+    bank_balances = np.empty(n)
+    cpf_interests = np.empty(n)
+    cpf_balances = np.empty(n)
+    pending_cpf = 0.0
+    for i in range(n):
+        bank_interests[i] = (
+            bank_bal * bank_base_interest / 12 / 100
+            + min(bank_bal, bank_bonus_interest_cap) * bank_bonus_interest / 12 / 100
+        )
+        bank_bal = bank_bal + bank_interests[i] + bank_incs[i]
+        bank_balances[i] = bank_bal
+        # CPF interest accrues monthly but is only credited in January
+        if month_of_year[i] == 1:
+            cpf_bal += pending_cpf
+            pending_cpf = 0.0
+        cpf_interests[i] = cpf_bal * cpf_interest / 12 / 100
+        pending_cpf += cpf_interests[i]
+        cpf_bal += cpf_incs[i]
+        cpf_balances[i] = cpf_bal
+
+    proj_df = pd.DataFrame(
+        {
+            "Salary": salaries,
+            "Bank Increase": bank_incs,
+            "Bank Interest": bank_interests,
+            "Bank Balance": bank_balances,
+            "CPF(OA) Increase": cpf_incs,
+            "CPF(OA) Interest": cpf_interests,
+            "CPF(OA) Balance": cpf_balances,
+            "Total balance": bank_balances + cpf_balances,
+        },
+        index=[f"{y}-{m:02d}" for y, m in zip(years, month_of_year)],
+        columns=COLUMNS,
+    )
+    proj_df.index.name = "Year/Month"
+    return proj_df
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+from datetime import date
+from resale.appreciation import appreciation_ratios, trailing_appreciation
+from resale.cube import PriceCube, cube_pivot, cube_towns
+from resale.forecast import project_prices
+
+OUTLOOK_YEARS = 100  # covers any buying age from today
+
+
+def town_outlook(
+    cube: PriceCube,
+    flat_type: str,
+    towns: list | None = None,
+    agg: str = "median",
+    appreciation: str = "5 Years",
+    start_year: int | None = None,
+    years: int = OUTLOOK_YEARS,
+):
+    # Projected price per town and year, rounded at each step like main.py
+    towns = cube_towns(cube, flat_type) if towns is None else towns
+    pivot = cube_pivot(cube, flat_type, towns, agg=agg).round(2)
+    rates = trailing_appreciation(appreciation_ratios(pivot)).round(2)
+    start_year = start_year or date.today().year
+    return project_prices(
+        pivot.iloc[-1], rates.loc[appreciation], start_year, years
+    ).round(2)
+
+
+def budget_chance(last_prices: pd.Series, growth: np.ndarray, max_property: float):
+    # Share of simulate_growth paths on which each town's price in the final
+    # simulated year is within the budget
+    within = growth[:, -1] <= max_property / last_prices.to_numpy(dtype=float)[:, None]
+    return pd.Series(within.mean(axis=1), index=last_prices.index)
+
+
+def rank_towns(
+    prices: pd.Series,
+    max_property: float | None = None,
+    chance: pd.Series | None = None,
+):
+    # Cheapest town first, with what is left of the budget if there is one
+    # and, from budget_chance, how likely each town is to stay within it
+    prices = prices.sort_values(kind="stable")
+    ranking_df = pd.DataFrame({"Town": prices.index, "Value": prices.to_numpy()})
+    if max_property is not None:
+        ranking_df["Balance from Budget"] = max_property - prices.to_numpy()
+    if chance is not None:
+        ranking_df["Chance within Budget"] = chance.reindex(prices.index).to_numpy()
+    ranking_df.index = pd.RangeIndex(1, len(ranking_df) + 1, name="Rank")
+    return ranking_df
+
+
+def rank_scenarios(outlook: pd.DataFrame, results: pd.DataFrame, start: date):
+    # rank_towns for every scenario at once, each at its own buying year, as
+    # one long frame of (scenario, Rank) rows
+    buy_months = start.year * 12 + start.month - 1 + results["months"].to_numpy() - 1
+    rows = outlook.index.get_indexer(buy_months // 12)
+    if (rows < 0).any():
+        raise ValueError("Buying year is outside the price outlook")
+    prices = outlook.to_numpy(dtype=float)[rows]
+    order = np.argsort(prices, axis=1, kind="stable")
+    ranked = np.take_along_axis(prices, order, axis=1)
+    budgets = results["max_property"].to_numpy()[:, None]
+    n_scenarios, n_towns = ranked.shape
+    return pd.DataFrame(
+        {
+            "scenario": np.repeat(results.index.to_numpy(), n_towns),
+            "Rank": np.tile(np.arange(1, n_towns + 1), n_scenarios),
+            "Town": outlook.columns.to_numpy()[order].ravel(),
+            "Value": ranked.ravel(),
+            "Balance from Budget": (budgets - ranked).ravel(),
+        }
+    )
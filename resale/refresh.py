@@ -0,0 +1,90 @@
+import logging
+import threading
+from datetime import timedelta
+from typing import Callable
+
+# Kept free of heavy imports: the pages create their refreshers before the
+# first render. The default interval matches resale.store.REFRESH_AFTER.
+REFRESH_INTERVAL = timedelta(days=1)
+RETRY_AFTER = timedelta(minutes=1)
+
+logger = logging.getLogger(__name__)
+
+
+class Refresher:
+    # Runs `load` on a daemon thread, then again every `interval` (never when
+    # it is None). Each new value replaces the old one in a single reference
+    # swap, so readers always get a complete value and never wait on a
+    # reload. A failed reload keeps serving the previous value.
+    def __init__(
+        self,
+        load: Callable,
+        interval: timedelta = REFRESH_INTERVAL,
+        retry_after: timedelta = RETRY_AFTER,
+        name: str = "refresher",
+    ):
+        self.load = load
+        self.interval = interval
+        self.retry_after = retry_after
+        self.version = 0  # bumped on every successful load
+        # (value, error) of the latest load, replaced as one tuple so a
+        # reader never pairs a value with another load's error. The error is
+        # cleared by a success; a failure keeps the previous value.
+        self._state = (None, None)
+        # Guards the state together with _ready, so a reader that saw a
+        # failed first load cannot clear _ready after a retry succeeded
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    @property
+    def error(self):
+        return self._state[1]
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.clear()
+            try:
+                value = self.load()
+            except Exception as e:
+                logger.exception("Refresh failed")
+                with self._lock:
+                    self._state = (self._state[0], e)
+                    self._ready.set()
+                delay = self.retry_after
+            else:
+                with self._lock:
+                    self._state = (value, None)
+                    self.version += 1
+                    self._ready.set()
+                delay = self.interval
+            # Sleeps until the next scheduled load or a refresh() request
+            self._wake.wait(None if delay is None else delay.total_seconds())
+
+    def result(self, timeout: float | None = None):
+        # Blocks only until the first load has finished, like Future.result()
+        if not self._ready.wait(timeout):
+            raise TimeoutError(f"{self._thread.name} has not loaded yet")
+        with self._lock:
+            value, error = self._state
+            if value is None and self._ready.is_set():
+                # Retry straight away; later callers wait for that attempt,
+                # and callers that already got past the wait do not retry
+                self._ready.clear()
+                self.refresh()
+        if value is None:
+            raise error
+        return value
+
+    def refresh(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
@@ -0,0 +1,60 @@
+import pandas as pd
+from pandas.api.types import CategoricalDtype
+
+CATEGORICAL_COLUMNS = [
+    "town",
+    "flat_type",
+    "block",
+    "street_name",
+    "storey_range",
+    "flat_model",
+    "remaining_lease",
+]
+NUMERIC_DTYPES = {
+    "resale_price": "int32",
+    "floor_area_sqm": "float32",
+    "lease_commence_date": "int16",
+}
+
+
+def normalise(df: pd.DataFrame):
+    df = df.copy()
+    if "flat_type" in df and not isinstance(df["flat_type"].dtype, CategoricalDtype):
+        df["flat_type"] = df["flat_type"].str.replace(
+            "MULTI GENERATION", "MULTI-GENERATION", case=False, regex=True
+        )
+    # Monthly periods so callers get .dt.year etc. without re-parsing strings
+    if "month" in df and not isinstance(df["month"].dtype, pd.PeriodDtype):
+        df["month"] = pd.to_datetime(df["month"], format="%Y-%m").dt.to_period("M")
+    for col, dtype in NUMERIC_DTYPES.items():
+        if col in df:
+            if dtype.startswith("int"):
+                df[col] = df[col].round()
+            df[col] = df[col].astype(dtype)
+    for col in CATEGORICAL_COLUMNS:
+        if col in df:
+            df[col] = df[col].astype("category")
+    return df
+
+
+def concat_normalised(frames: list):
+    # pd.concat falls back to object dtype unless every categorical matches,
+    # so align each column onto the union of categories first
+    frames = [df.copy(deep=False) for df in frames]
+    for col in CATEGORICAL_COLUMNS:
+        present = [df[col].astype("category") for df in frames if col in df]
+        if not present:
+            continue
+        # A partition whose row groups were all skipped reads back with empty
+        # object categories, which union_categoricals refuses to mix with str
+        present = [s for s in present if len(s.cat.categories)] or present[:1]
+        categories = pd.api.types.union_categoricals(
+            present, ignore_order=True
+        ).categories
+        dtype = CategoricalDtype(categories.sort_values())
+        for df in frames:
+            if col in df:
+                df[col] = df[col].astype(dtype)
+            else:
+                df[col] = pd.Categorical([None] * len(df), dtype=dtype)
+    return pd.concat(frames, ignore_index=True)
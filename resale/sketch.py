@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+from resale.schema import concat_normalised
+
+# Mergeable quantile sketches on log-spaced price bins (the DDSketch scheme).
+# Every price falls in bin i = ceil(log(price) / log(gamma)), where
+# gamma = (1 + a) / (1 - a), and the bin reports 2 * gamma**i / (gamma + 1).
+# For a cell of n prices, the estimate for quantile q is within a relative
+# error a of the exact price of rank floor(q * (n - 1)) (0-based):
+#     |estimate - exact| <= a * exact
+# Interpolating quantiles such as pandas' median of an even-sized cell sit
+# between two ranks, so they may differ by a further fraction of that gap.
+# A cell holds one row per occupied bin, so its size is bounded by the price
+# range (about 350 bins between $5k and $5M at a = 1%) rather than by the
+# number of transactions. Merging sketches only adds counts per bin.
+RELATIVE_ACCURACY = 0.01
+SKETCH_KEYS = ["month", "town", "flat_type"]
+QUANTILES = [0.25, 0.5, 0.75, 0.9]
+
+
+def log_gamma(alpha: float = RELATIVE_ACCURACY):
+    return np.log((1 + alpha) / (1 - alpha))
+
+
+def bin_index(values, alpha: float = RELATIVE_ACCURACY):
+    return np.ceil(np.log(values) / log_gamma(alpha)).astype(np.int32)
+
+
+def bin_value(index, alpha: float = RELATIVE_ACCURACY):
+    gamma = (1 + alpha) / (1 - alpha)
+    return 2 * gamma ** np.asarray(index, dtype=float) / (gamma + 1)
+
+
+def build_sketches(
+    df: pd.DataFrame, keys: list = SKETCH_KEYS, alpha: float = RELATIVE_ACCURACY
+):
+    sketch_df = df[keys].copy()
+    sketch_df["bin"] = bin_index(df["resale_price"].to_numpy(), alpha)
+    sketch_df = sketch_df.groupby(keys + ["bin"], observed=True).size()
+    return sketch_df.rename("count").astype(np.int32).reset_index()
+
+
+def merge_sketches(sketches: list, keys: list = SKETCH_KEYS):
+    # Also rolls sketches up to coarser keys, e.g. months into years
+    sketch_df = concat_normalised(sketches)
+    sketch_df = sketch_df.groupby(keys + ["bin"], observed=True)["count"].sum()
+    return sketch_df.reset_index()
+
+
+def sketch_quantiles(
+    sketch_df: pd.DataFrame,
+    keys: list,
+    quantiles: list = QUANTILES,
+    alpha: float = RELATIVE_ACCURACY,
+):
+    sketch_df = sketch_df.sort_values(keys + ["bin"])
+    cells = sketch_df.groupby(keys, observed=True, sort=False)
+    cell_ids = cells.ngroup().to_numpy()
+    counts = sketch_df["count"].to_numpy(dtype=np.int64)
+    cumulative = np.cumsum(counts)
+    first_rows = np.flatnonzero(np.r_[True, cell_ids[1:] != cell_ids[:-1]])
+    totals = np.add.reduceat(counts, first_rows) if len(counts) else counts
+    before = cumulative[first_rows] - counts[first_rows]
+    bins = sketch_df["bin"].to_numpy()
+    result_df = pd.DataFrame(index=cells.size().index)
+    for q in quantiles:
+        # First bin whose running count passes the target rank
+        target = before + np.floor(q * (totals - 1)).astype(np.int64)
+        rows = np.searchsorted(cumulative, target, side="right")
+        result_df[f"p{round(q * 100)}"] = bin_value(bins[rows], alpha)
+    return result_df
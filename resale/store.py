@@ -0,0 +1,241 @@
+import json
+import os
+import tempfile
+import threading
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from resale.blocks import build_partials, merge_partials
+from resale.ingest import API_URL, DATASETS, LATEST_DATASET, IngestError, fetch_datasets
+from resale.schema import concat_normalised, normalise
+from resale.sketch import build_sketches, merge_sketches
+
+STORE_DIR = Path("data")
+# Only applies to LATEST_DATASET, the other datasets are archives
+REFRESH_AFTER = timedelta(days=1)
+# Partitions are in month order, so row groups this size give month ranges
+# a few groups to skip by their statistics
+ROW_GROUP_ROWS = 2**16
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+
+_meta_lock = threading.Lock()
+
+
+def partition_path(store_dir: Path, dataset: str):
+    return Path(store_dir) / f"{dataset}.parquet"
+
+
+def read_meta(store_dir: Path):
+    try:
+        with open(Path(store_dir) / "meta.json") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+@contextmanager
+def replacing(path: Path):
+    # Yields a temporary path of its own next to `path` and moves it over
+    # `path` once written, so readers never see a half-written file and
+    # concurrent writers never write into the same temporary file
+    fd, tmp_path = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+@contextmanager
+def meta_lock(store_dir: Path):
+    # Serialises store updates between sessions of this process and, where
+    # flock is available, between processes sharing the store
+    with _meta_lock, open(Path(store_dir) / "meta.lock", "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)  # released when the file closes
+        yield
+
+
+def write_meta(store_dir: Path, meta: dict):
+    with replacing(Path(store_dir) / "meta.json") as tmp_path:
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f, indent=2)
+
+
+def sketch_path(store_dir: Path, dataset: str):
+    return Path(store_dir) / f"{dataset}.sketch.parquet"
+
+
+def blocks_path(store_dir: Path, dataset: str):
+    return Path(store_dir) / f"{dataset}.blocks.parquet"
+
+
+def write_frame(path: Path, df: pd.DataFrame):
+    with replacing(Path(path)) as tmp_path:
+        df.to_parquet(tmp_path, index=False, row_group_size=ROW_GROUP_ROWS)
+
+
+def dataset_version(datasets: list = DATASETS, store_dir: Path = STORE_DIR):
+    # Changes whenever any of the datasets is refetched; used in cache keys
+    meta = read_meta(store_dir)
+    return tuple(meta.get(dataset, {}).get("fetched_at") for dataset in datasets)
+
+
+def in_months(stats: pq.Statistics, start: pd.Period, end: pd.Period):
+    if stats is None or not stats.has_min_max:
+        return True
+    return (start is None or stats.max >= start.ordinal) and (
+        end is None or stats.min <= end.ordinal
+    )
+
+
+def read_partition(
+    path: Path, columns: list | None = None, months: tuple | None = None
+):
+    # Only the requested columns are decoded. With a (start, end) month range,
+    # either end open as None, row groups whose month statistics fall outside
+    # it are never read and the rest are filtered before reaching pandas.
+    if months is None:
+        return pd.read_parquet(path, columns=columns)
+    start, end = months
+    parquet = pq.ParquetFile(path)
+    position = parquet.schema_arrow.get_field_index("month")
+    row_groups = [
+        i
+        for i in range(parquet.num_row_groups)
+        if in_months(
+            parquet.metadata.row_group(i).column(position).statistics, start, end
+        )
+    ]
+    read_columns = None if columns is None else list(dict.fromkeys(["month", *columns]))
+    table = parquet.read_row_groups(row_groups, columns=read_columns)
+    ordinals = table["month"]  # monthly period ordinals, as stored
+    if isinstance(ordinals.type, pa.ExtensionType):
+        ordinals = pa.chunked_array(
+            [chunk.storage for chunk in ordinals.chunks], ordinals.type.storage_type
+        )
+    mask = None
+    if start is not None:
+        mask = pc.greater_equal(ordinals, start.ordinal)
+    if end is not None:
+        upper = pc.less_equal(ordinals, end.ordinal)
+        mask = upper if mask is None else pc.and_(mask, upper)
+    if mask is not None:
+        table = table.filter(mask)
+    df = table.to_pandas()
+    return df if columns is None else df[columns]
+
+
+def select_frame(
+    df: pd.DataFrame, columns: list | None = None, months: tuple | None = None
+):
+    # The same selection as read_partition, for a frame already in memory
+    if months is not None:
+        start, end = months
+        keep = pd.Series(True, index=df.index)
+        if start is not None:
+            keep &= df["month"] >= start
+        if end is not None:
+            keep &= df["month"] <= end
+        df = df[keep]
+    return df if columns is None else df[columns]
+
+
+def is_stale(dataset: str, entry: dict, refresh_after: timedelta = REFRESH_AFTER):
+    if dataset != LATEST_DATASET:
+        return False
+    fetched_at = datetime.fromisoformat(entry["fetched_at"])
+    return datetime.now() - fetched_at > refresh_after
+
+
+def load_resale_dataset(
+    datasets: list = DATASETS,
+    store_dir: Path = STORE_DIR,
+    refresh_after: timedelta = REFRESH_AFTER,
+    api_url: str = API_URL,
+    columns: list | None = None,
+    months: tuple | None = None,
+):
+    # columns and months (see read_partition) limit what is read; fetched
+    # partitions are still stored in full
+    Path(store_dir).mkdir(parents=True, exist_ok=True)
+    meta = read_meta(store_dir)
+    frames = {}
+    stale = {}
+    for dataset in datasets:
+        path = partition_path(store_dir, dataset)
+        if dataset not in meta or not path.exists():
+            continue
+        if is_stale(dataset, meta[dataset], refresh_after):
+            stale[dataset] = path
+        else:
+            frames[dataset] = read_partition(path, columns, months)
+
+    missing = [dataset for dataset in datasets if dataset not in frames]
+    if missing:
+        fetched = {}
+        try:
+            fetch_datasets(missing, fetched, api_url=api_url)
+        except IngestError as e:
+            # Serve the previous copy of a stale dataset rather than failing outright
+            if any(dataset not in stale for dataset in e.errors):
+                raise
+        with meta_lock(store_dir):
+            # Re-read under the lock so entries stored by other writers since
+            # the read above are kept
+            meta = read_meta(store_dir)
+            for dataset in missing:
+                if dataset not in fetched:
+                    frames[dataset] = read_partition(stale[dataset], columns, months)
+                    continue
+                # The latest dataset is republished in full, so the refetched
+                # copy replaces its partition and is appended after the archives
+                df = normalise(fetched[dataset])
+                write_frame(partition_path(store_dir, dataset), df)
+                write_frame(sketch_path(store_dir, dataset), build_sketches(df))
+                write_frame(blocks_path(store_dir, dataset), build_partials(df))
+                meta[dataset] = {
+                    "fetched_at": datetime.now().isoformat(timespec="seconds"),
+                    "rows": len(df),
+                }
+                frames[dataset] = select_frame(df, columns, months)
+            write_meta(store_dir, meta)
+
+    return concat_normalised([frames[dataset] for dataset in datasets])
+
+
+def load_resale_sketches(datasets: list = DATASETS, store_dir: Path = STORE_DIR):
+    # Monthly price sketches are written next to each partition at ingest;
+    # partitions stored before sketches existed get theirs built here
+    sketches = []
+    for dataset in datasets:
+        path = sketch_path(store_dir, dataset)
+        if not path.exists():
+            df = pd.read_parquet(partition_path(store_dir, dataset))
+            write_frame(path, build_sketches(df))
+        sketches.append(pd.read_parquet(path))
+    return merge_sketches(sketches)
+
+
+def load_block_partials(datasets: list = DATASETS, store_dir: Path = STORE_DIR):
+    # Monthly block partials follow the same pattern as the sketches
+    partials = []
+    for dataset in datasets:
+        path = blocks_path(store_dir, dataset)
+        if not path.exists():
+            df = pd.read_parquet(partition_path(store_dir, dataset))
+            write_frame(path, build_partials(df))
+        partials.append(pd.read_parquet(path))
+    return merge_partials(partials)
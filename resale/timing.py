@@ -0,0 +1,170 @@
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from functools import wraps
+
+ENV_FLAG = "RESALE_TIMINGS"  # set to 1 to time every session
+BACKGROUND_RECORDS = 100  # background loads kept for the sidebar
+
+logger = logging.getLogger(__name__)
+
+# tracemalloc is process-wide: only one top-level stage at a time turns it on,
+# and only that stage and the stages nested in it on the same thread report a
+# peak
+_tracing_lock = threading.Lock()
+_tracing_thread = None
+
+
+@dataclass
+class StageTiming:
+    stage: str
+    depth: int  # 0 for top-level stages, +1 per enclosing stage
+    seconds: float
+    rows_in: int | None = None
+    rows_out: int | None = None
+    # tracemalloc peak above the stage's starting memory. Process-wide, so it
+    # includes allocations other threads made during the stage.
+    process_peak_mb: float | None = None
+    thread: str | None = None
+
+
+def enabled_from_env():
+    return os.environ.get(ENV_FLAG) == "1"
+
+
+def count_rows(value):
+    # Frames, series and arrays; a tuple result is counted by its first item
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    return len(value) if hasattr(value, "shape") else None
+
+
+def start_tracing():
+    # True when this call turned tracing on and must turn it off again
+    global _tracing_thread
+    with _tracing_lock:
+        if tracemalloc.is_tracing():
+            return False
+        tracemalloc.start()
+        _tracing_thread = threading.get_ident()
+        return True
+
+
+def stop_tracing():
+    global _tracing_thread
+    with _tracing_lock:
+        tracemalloc.stop()
+        _tracing_thread = None
+
+
+class Timings:
+    # Collects one StageTiming per timed stage of a script run. When disabled,
+    # timed() calls straight through and stage() yields without measuring.
+    # Memory is only traced while a top-level stage runs, and each stage stops
+    # what it started in a finally block, so a rerun or an error mid-run never
+    # leaves tracing on for later sessions. With max_records, only the latest
+    # records are kept, for collectors that outlive a run.
+    def __init__(
+        self,
+        enabled: bool = False,
+        trace_memory: bool = True,
+        max_records: int | None = None,
+        log: bool | None = None,
+    ):
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if (enabled if log is None else log) and not logger.handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+
+    @contextmanager
+    def stage(self, name: str, rows_in: int | None = None):
+        info = {"rows_in": rows_in, "rows_out": None}
+        if not self.enabled:
+            yield info
+            return
+        # Each open stage keeps [memory at start, highest peak seen by children],
+        # since a child's reset_peak() would otherwise hide the parent's peak
+        stack = self._local.__dict__.setdefault("stack", [])
+        started = self.trace_memory and not stack and start_tracing()
+        # Stages outside the tracing thread skip reset_peak(), which would
+        # clear the peak of the stage that owns tracing
+        measuring = _tracing_thread == threading.get_ident()
+        if measuring:
+            tracemalloc.reset_peak()
+            stack.append([tracemalloc.get_traced_memory()[0], 0])
+        else:
+            stack.append([None, 0])
+        start = time.perf_counter()
+        try:
+            yield info
+        finally:
+            seconds = time.perf_counter() - start
+            start_memory, child_peak = stack.pop()
+            peak_mb = None
+            if start_memory is not None:
+                peak = max(tracemalloc.get_traced_memory()[1], child_peak)
+                if stack:
+                    stack[-1][1] = max(stack[-1][1], peak)
+                peak_mb = round((peak - start_memory) / 2**20, 2)
+            if started:
+                stop_tracing()
+            record = StageTiming(
+                name,
+                len(stack),
+                round(seconds, 6),
+                info["rows_in"],
+                info["rows_out"],
+                peak_mb,
+                threading.current_thread().name,
+            )
+            with self._lock:
+                self.records.append(record)
+            logger.info(json.dumps(asdict(record)))
+
+    def timed(self, func=None, *, name: str | None = None):
+        # Decorator, bare or with a stage name; rows are counted on the first
+        # positional argument and on the result
+        if func is None:
+            return lambda func: self.timed(func, name=name)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return func(*args, **kwargs)
+            rows_in = count_rows(args[0]) if args else None
+            with self.stage(name or func.__name__, rows_in) as info:
+                result = func(*args, **kwargs)
+                info["rows_out"] = count_rows(result)
+            return result
+
+        return wrapper
+
+    def to_records(self):
+        # Stages may finish on other threads, e.g. background loads
+        with self._lock:
+            records = list(self.records)
+        return [asdict(record) for record in records]
+
+    def to_json(self):
+        return json.dumps(self.to_records(), indent=2)
+
+
+def background_timings():
+    # Process-wide collector for loads that run on refresher threads and
+    # outlive the script run that started them. Only times: tracing memory
+    # here would keep tracemalloc on for every reload.
+    return Timings(
+        True, trace_memory=False, max_records=BACKGROUND_RECORDS, log=enabled_from_env()
+    )
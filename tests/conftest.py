@@ -0,0 +1,72 @@
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+CSV_HEADER = (
+    "month,town,flat_type,block,street_name,storey_range,floor_area_sqm,"
+    "flat_model,lease_commence_date,remaining_lease,resale_price\n"
+)
+
+
+class FakeAPI:
+    # Stands in for the data.gov.sg download API: every dataset is one row
+    # at `price` per month in `months`, served after `delay` seconds, or a 500
+    # while `fail` is set or for the datasets in `failing`
+    def __init__(self):
+        self.price = 300000
+        self.months = ["2026-01"]
+        self.delay = 0
+        self.fail = False
+        self.failing = set()
+        self.requests = 0
+        self.fetches = Counter()  # download requests per dataset
+        handler = type("Handler", (FakeHandler,), {"api": self})
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+
+    def csv(self):
+        return CSV_HEADER + "".join(
+            f"{month},BEDOK,4 ROOM,1,BEDOK NTH RD,01 TO 03,90,"
+            f"Improved,1990,63 years,{self.price}\n"
+            for month in self.months
+        )
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    api: FakeAPI
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.endswith("/initiate-download"):
+            dataset = self.path.split("/")[-2]
+            self.api.requests += 1
+            self.api.fetches[dataset] += 1
+            if self.api.fail or dataset in self.api.failing:
+                self.send_response(500)
+                self.end_headers()
+                return
+            body = json.dumps({"data": {"url": self.api.url + "csv"}})
+        else:
+            time.sleep(self.api.delay)
+            body = self.api.csv()
+        body = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def fake_api():
+    api = FakeAPI()
+    thread = threading.Thread(target=api.server.serve_forever, daemon=True)
+    thread.start()
+    yield api
+    api.server.shutdown()
+    api.server.server_close()
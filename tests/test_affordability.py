@@ -0,0 +1,113 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from resale.affordability import (
+    MSR,
+    RESULT_COLUMNS,
+    evaluate_scenario,
+    sweep_scenarios,
+    sweep_scenarios_parallel,
+)
+
+START = date(2025, 6, 1)
+
+
+def random_scenarios(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    age = rng.integers(20, 50, rows)
+    return pd.DataFrame(
+        {
+            "age": age,
+            "birth_month": rng.integers(1, 13, rows),
+            "buying_age": age + rng.integers(1, 15, rows),
+            "salary": rng.uniform(2000, 15000, rows),
+            "bank_bal": rng.uniform(0, 100000, rows),
+            "bank_bal_inc": rng.uniform(0, 3000, rows),
+            "cpf_bal": rng.uniform(0, 100000, rows),
+            "salary_raise": rng.uniform(0, 6, rows),
+            "raise_month": rng.integers(1, 13, rows),
+            "loan_interest": rng.choice([0, 2.6, 4], rows),
+            "bank_usage": np.where(
+                rng.random(rows) < 0.5, np.nan, rng.uniform(0, 50000, rows)
+            ),
+            "cpf_usage": np.where(
+                rng.random(rows) < 0.5, np.nan, rng.uniform(0, 50000, rows)
+            ),
+        },
+        index=pd.RangeIndex(100, 100 + rows, name="scenario"),
+    )
+
+
+def evaluate_each(scenarios):
+    return pd.DataFrame(
+        [evaluate_scenario(row, start=START) for row in scenarios.to_dict("records")],
+        index=scenarios.index,
+    )
+
+
+def test_sweep_matches_scalar_path():
+    scenarios = random_scenarios(60)
+    pd.testing.assert_frame_equal(
+        sweep_scenarios(scenarios, start=START),
+        evaluate_each(scenarios)[RESULT_COLUMNS],
+        check_exact=False,
+        rtol=1e-9,
+    )
+
+
+def test_parallel_matches_sweep():
+    scenarios = random_scenarios(20, seed=1)
+    pd.testing.assert_frame_equal(
+        sweep_scenarios_parallel(scenarios, start=START, max_workers=2, chunksize=4),
+        sweep_scenarios(scenarios, start=START),
+        check_exact=False,
+        rtol=1e-9,
+    )
+
+
+def test_zero_interest_loan():
+    scenarios = random_scenarios(10, seed=2).assign(loan_interest=0, loan_duration=20)
+    results = sweep_scenarios(scenarios, start=START)
+    # Without interest the loan is every monthly payment added up
+    np.testing.assert_allclose(
+        results["loan"], MSR * results["salary_final"] * 20 * 12, rtol=1e-12
+    )
+    assert np.isfinite(results["max_property"]).all()
+
+
+def test_defaulted_usage_takes_whole_balance():
+    scenarios = random_scenarios(10, seed=3).drop(columns=["bank_usage", "cpf_usage"])
+    results = sweep_scenarios(scenarios, start=START)
+    np.testing.assert_allclose(
+        results["max_property"],
+        results["total_balance"] + results["loan"] + 40000,
+        rtol=1e-12,
+    )
+
+
+def test_usage_is_capped_at_balance():
+    scenarios = random_scenarios(1, seed=4).assign(bank_usage=1e12, cpf_usage=0)
+    results = sweep_scenarios(scenarios, start=START)
+    np.testing.assert_allclose(
+        results["max_property"],
+        results["bank_balance"] + results["loan"] + 40000,
+        rtol=1e-12,
+    )
+
+
+def test_buying_before_start_raises():
+    scenarios = random_scenarios(5, seed=5)
+    # Already past the buying birthday
+    scenarios.loc[102, "buying_age"] = scenarios.loc[102, "age"] - 1
+    with pytest.raises(ValueError, match="before the start"):
+        sweep_scenarios(scenarios, start=START)
+    with pytest.raises(ValueError, match="before the start"):
+        evaluate_scenario(scenarios.loc[102].to_dict(), start=START)
+
+
+def test_missing_columns_raise():
+    with pytest.raises(ValueError, match="salary"):
+        sweep_scenarios(random_scenarios(3).drop(columns="salary"), start=START)
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import synthetic_transactions
+from resale.blocks import (
+    BLOCK_KEYS,
+    SUM_COLUMNS,
+    block_means,
+    build_partials,
+    merge_partials,
+    window_totals,
+)
+from resale.schema import normalise
+
+
+@pytest.fixture(scope="module")
+def transactions():
+    return normalise(synthetic_transactions(20_000, "2015-01", "2019-12", seed=3))
+
+
+@pytest.fixture(scope="module")
+def partials(transactions):
+    # Two datasets split partway through a month, as the store's partitions
+    # can be, so that month's partials are summed across both
+    months = transactions["month"]
+    boundary = pd.Period("2017-06", "M")
+    split = (months < boundary).sum() + (months == boundary).sum() // 2
+    return merge_partials(
+        [
+            build_partials(transactions.iloc[:split]),
+            build_partials(transactions.iloc[split:]),
+        ]
+    )
+
+
+def masked_totals(partials, start, end):
+    rows = partials[partials["month"].between(start, end)]
+    return rows.groupby(BLOCK_KEYS, observed=True)[["count"] + SUM_COLUMNS].sum()
+
+
+@pytest.mark.parametrize(
+    "end",
+    # The first month, mid-range, across the split month, the last month and
+    # past the end of the data
+    ["2015-01", "2016-06", "2017-09", "2019-12", "2020-06", "2021-06"],
+)
+def test_window_totals_match_masked_rows(partials, end):
+    window = window_totals(partials, pd.Period(end, "M"))
+    assert window.start == window.end - 11
+    pd.testing.assert_frame_equal(
+        window.totals, masked_totals(partials, window.start, window.end)
+    )
+
+
+def test_window_means_match_raw_rows(transactions, partials):
+    window = window_totals(partials, pd.Period("2017-07", "M"))
+    rows = transactions[transactions["month"].between(window.start, window.end)]
+    expected = rows.groupby(BLOCK_KEYS, as_index=False, observed=True)[
+        SUM_COLUMNS
+    ].mean()
+    actual = block_means(window.totals)
+    assert (
+        actual[BLOCK_KEYS].astype(str).to_numpy()
+        == expected[BLOCK_KEYS].astype(str).to_numpy()
+    ).all()
+    np.testing.assert_allclose(
+        actual[SUM_COLUMNS].to_numpy(float),
+        expected[SUM_COLUMNS].to_numpy(float),
+        rtol=1e-9,
+    )
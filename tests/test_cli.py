@@ -0,0 +1,88 @@
+import json
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from resale.affordability import sweep_scenarios
+from resale.cli import CHUNKS_PER_WORKER, run_scenarios, write_chunks
+from resale.ranking import rank_scenarios
+
+START = date(2026, 1, 1)
+
+
+def scenario_chunks(n_chunks: int, rows: int = 3, consumed: list | None = None):
+    rng = np.random.default_rng(0)
+    for i in range(n_chunks):
+        if consumed is not None:
+            consumed.append(i)
+        chunk = pd.DataFrame(
+            {
+                "age": rng.integers(25, 40, rows),
+                "birth_month": rng.integers(1, 13, rows),
+                "buying_age": 45,
+                "salary": rng.uniform(3000, 9000, rows),
+                "bank_bal": 20000.0,
+                "bank_bal_inc": 1000.0,
+                "cpf_bal": 30000.0,
+            },
+            index=pd.RangeIndex(i * rows, (i + 1) * rows, name="scenario"),
+        )
+        yield chunk
+
+
+def test_run_scenarios_keeps_order():
+    chunks = list(scenario_chunks(5))
+    results = pd.concat(run_scenarios(iter(chunks), START, max_workers=2))
+    expected = pd.concat(
+        [pd.concat([chunk, sweep_scenarios(chunk, START)], axis=1) for chunk in chunks]
+    )
+    pd.testing.assert_frame_equal(results, expected)
+
+
+def test_run_scenarios_reads_input_as_it_goes():
+    consumed = []
+    results = run_scenarios(
+        scenario_chunks(20, consumed=consumed), START, max_workers=1
+    )
+    next(results)
+    # The first result is ready after a bounded read-ahead, not the whole input
+    assert len(consumed) <= CHUNKS_PER_WORKER + 1
+    assert len(list(results)) == 19
+    assert len(consumed) == 20
+
+
+def test_write_jsonl_rankings_without_index(tmp_path):
+    outlook = pd.DataFrame(
+        {"BEDOK": [500000.0] * 30, "YISHUN": [450000.0] * 30},
+        index=pd.RangeIndex(2026, 2056, name="Year"),
+    )
+    chunks = [
+        rank_scenarios(outlook, sweep_scenarios(chunk, START), START)
+        for chunk in scenario_chunks(2)
+    ]
+    path = tmp_path / "ranks.jsonl"
+    write_chunks(chunks, str(path))
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(records) == 12
+    assert set(records[0]) == {
+        "scenario",
+        "Rank",
+        "Town",
+        "Value",
+        "Balance from Budget",
+    }
+    assert [record["scenario"] for record in records[::2]] == list(range(6))
+
+
+def test_write_jsonl_keeps_scenario_ids(tmp_path):
+    chunk = pd.DataFrame(
+        {"max_property": [1.0, 2.0]}, index=pd.Index(["a", "b"], name="scenario")
+    )
+    path = tmp_path / "out.jsonl"
+    write_chunks([chunk], str(path))
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert records == [
+        {"scenario": "a", "max_property": 1.0},
+        {"scenario": "b", "max_property": 2.0},
+    ]
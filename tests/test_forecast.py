@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from resale.forecast import BANDS, price_bands, project_prices, simulate_growth
+from resale.ranking import budget_chance
+
+TOWNS = pd.Index(["ANG MO KIO", "BEDOK", "PUNGGOL"], name="town")
+LAST_PRICES = pd.Series([500000.0, 450000.0, 600000.0], index=TOWNS)
+
+
+def ratios_frame(columns, years=range(2015, 2025)):
+    return pd.DataFrame(columns, index=pd.Index(years, name="Year"))
+
+
+def test_shape_and_seed():
+    rng = np.random.default_rng(1)
+    ratios = ratios_frame({town: rng.uniform(0.9, 1.2, 10) for town in TOWNS})
+    growth = simulate_growth(ratios, TOWNS, 5, paths=200)
+    assert growth.shape == (len(TOWNS), 6, 200)
+    assert growth.dtype == np.float32
+    assert (growth[:, 0] == 1).all()
+    np.testing.assert_array_equal(growth, simulate_growth(ratios, TOWNS, 5, paths=200))
+    assert not np.array_equal(growth, simulate_growth(ratios, TOWNS, 5, 200, seed=1))
+
+
+def test_draws_only_the_towns_own_ratios():
+    ratios = ratios_frame(
+        {"ANG MO KIO": [1.1, 1.2, np.nan], "BEDOK": [0.9, np.nan, 1.05]},
+        years=[2022, 2023, 2024],
+    )
+    growth = simulate_growth(ratios, TOWNS[:2], 3, paths=500)
+    yearly = growth[:, 1:] / growth[:, :-1]
+    np.testing.assert_allclose(
+        np.unique(yearly[0].round(5)), np.float32([1.1, 1.2]), rtol=1e-6
+    )
+    np.testing.assert_allclose(
+        np.unique(yearly[1].round(5)), np.float32([0.9, 1.05]), rtol=1e-6
+    )
+
+
+@pytest.mark.parametrize("ratio", [0.95, 1.0, 1.04])
+def test_single_ratio_matches_projection(ratio):
+    # With one ratio to draw from, every path is the deterministic projection
+    ratios = ratios_frame({town: [ratio] for town in TOWNS}, years=[2024])
+    growth = simulate_growth(ratios, TOWNS, 30, paths=50)
+    expected = project_prices(
+        LAST_PRICES, pd.Series((ratio - 1) * 100, index=TOWNS), 2025, 30
+    )
+    prices = growth.transpose(2, 1, 0) * LAST_PRICES.to_numpy()
+    np.testing.assert_allclose(
+        prices, np.broadcast_to(expected.to_numpy(), prices.shape), rtol=1e-5
+    )
+    bands_df = price_bands(LAST_PRICES, growth, 2025)
+    assert bands_df.index.names == ["Band", "Year"]
+    assert list(bands_df.index.levels[0]) == list(BANDS)
+    for band in BANDS:
+        pd.testing.assert_frame_equal(
+            bands_df.loc[band], expected, check_exact=False, rtol=1e-5
+        )
+
+
+def test_no_history_is_flat():
+    ratios = ratios_frame({"ANG MO KIO": [1.1, 1.2]}, years=[2023, 2024])
+    ratios["BEDOK"] = np.nan
+    # PUNGGOL is missing from the ratios altogether
+    growth = simulate_growth(ratios, TOWNS, 10, paths=100)
+    assert (growth[1:] == 1).all()
+    assert (growth[0, 1:] > 1).all()
+    bands_df = price_bands(LAST_PRICES, growth, 2025)
+    assert (bands_df[["BEDOK", "PUNGGOL"]] == LAST_PRICES[["BEDOK", "PUNGGOL"]]).all(
+        axis=None
+    )
+
+
+def test_bands_are_ordered():
+    rng = np.random.default_rng(2)
+    ratios = ratios_frame({town: rng.uniform(0.9, 1.2, 10) for town in TOWNS})
+    bands_df = price_bands(LAST_PRICES, simulate_growth(ratios, TOWNS, 8), 2025)
+    assert (bands_df.loc["P10"] <= bands_df.loc["P50"]).all(axis=None)
+    assert (bands_df.loc["P50"] <= bands_df.loc["P90"]).all(axis=None)
+
+
+def test_budget_chance():
+    # ANG MO KIO grows 10% or 20% in one year with even odds, BEDOK stays flat
+    ratios = ratios_frame(
+        {"ANG MO KIO": [1.1, 1.2], "BEDOK": [np.nan, np.nan]}, years=[2023, 2024]
+    )
+    growth = simulate_growth(ratios, TOWNS[:2], 1, paths=10_000)
+    last_prices = LAST_PRICES.iloc[:2]
+    chance = budget_chance(last_prices, growth, 560000)
+    assert chance.index.equals(TOWNS[:2])
+    assert chance["ANG MO KIO"] == pytest.approx(0.5, abs=0.02)
+    assert chance["BEDOK"] == 1
+    chance = budget_chance(last_prices, growth, 400000)
+    assert (chance == 0).all()
@@ -0,0 +1,103 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from resale.geocode import (
+    GEOCODE_CSV,
+    haversine_m,
+    load_geocodes,
+    lookup_coordinates,
+    lookup_positions,
+    within_radius,
+)
+
+GEOCODE_PATH = Path(__file__).resolve().parent.parent / GEOCODE_CSV
+
+
+@pytest.fixture(scope="module")
+def geocode_df():
+    return pd.read_csv(
+        GEOCODE_PATH,
+        usecols=["block", "street_name", "lat", "lon"],
+        dtype={"block": str, "street_name": str},
+    )
+
+
+@pytest.fixture(scope="module")
+def geocodes():
+    return load_geocodes(GEOCODE_PATH)
+
+
+def test_lookup_matches_merge(geocode_df, geocodes):
+    # Same coordinates as merging onto the CSV, first match of a duplicate
+    rng = np.random.default_rng(0)
+    addresses = geocode_df.sample(2000, replace=True, random_state=1)
+    addresses = addresses[["block", "street_name"]].reset_index(drop=True)
+    addresses.loc[rng.choice(len(addresses), 100), "block"] = "NO SUCH BLOCK"
+    expected = addresses.merge(
+        geocode_df.drop_duplicates(["block", "street_name"]),
+        on=["block", "street_name"],
+        how="left",
+    )
+    lat, lon = lookup_coordinates(
+        geocodes, addresses["block"], addresses["street_name"]
+    )
+    np.testing.assert_array_equal(lat, expected["lat"].to_numpy())
+    np.testing.assert_array_equal(lon, expected["lon"].to_numpy())
+
+    positions = lookup_positions(geocodes, addresses["block"], addresses["street_name"])
+    unknown = addresses["block"] == "NO SUCH BLOCK"
+    assert (positions[unknown.to_numpy()] == -1).all()
+    found = positions[~unknown.to_numpy()]
+    assert (geocodes.block[found] == addresses["block"][~unknown]).all()
+    assert (geocodes.street_name[found] == addresses["street_name"][~unknown]).all()
+
+
+def test_lookup_accepts_categoricals(geocode_df, geocodes):
+    addresses = geocode_df.head(50)
+    lat, _ = lookup_coordinates(
+        geocodes,
+        addresses["block"].astype("category"),
+        addresses["street_name"].astype("category"),
+    )
+    expected, _ = lookup_coordinates(
+        geocodes, addresses["block"], addresses["street_name"]
+    )
+    np.testing.assert_array_equal(lat, expected)
+
+
+def test_load_keeps_first_duplicate(tmp_path):
+    path = tmp_path / "geocodes.csv"
+    pd.DataFrame(
+        {
+            "block": ["1", "1", "2"],
+            "street_name": ["A ST", "A ST", "A ST"],
+            "lat": [1.30, 1.40, 1.35],
+            "lon": [103.8, 103.9, 103.85],
+        }
+    ).to_csv(path, index=False)
+    geocodes = load_geocodes(path)
+    assert len(geocodes.keys) == 2
+    lat, lon = lookup_coordinates(
+        geocodes, pd.Series(["1", "2", "3"]), pd.Series(["A ST", "A ST", "A ST"])
+    )
+    np.testing.assert_array_equal(lat, [1.30, 1.35, np.nan])
+    np.testing.assert_array_equal(lon, [103.8, 103.85, np.nan])
+
+
+@pytest.mark.parametrize("radius_m", [0, 100, 250, 400, 1000, 3000])
+def test_within_radius_matches_brute_force(geocodes, radius_m):
+    rng = np.random.default_rng(radius_m)
+    for position in rng.choice(len(geocodes.keys), 20, replace=False):
+        lat, lon = geocodes.lat[position], geocodes.lon[position]
+        distances = haversine_m(lat, lon, geocodes.lat, geocodes.lon)
+        expected = np.flatnonzero(distances <= radius_m)
+        actual = within_radius(geocodes, lat, lon, radius_m)
+        np.testing.assert_array_equal(np.sort(actual), expected)
+        assert position in actual
+
+
+def test_within_radius_outside_the_grid(geocodes):
+    assert len(within_radius(geocodes, 0.0, 0.0, 1000)) == 0
@@ -0,0 +1,59 @@
+import time
+
+import pytest
+
+from resale.ingest import DATASETS, IngestError, download_datasets, fetch_datasets
+
+
+def test_fetches_every_dataset(fake_api):
+    fetched = fetch_datasets(DATASETS, api_url=fake_api.url)
+    assert list(fetched) == DATASETS
+    assert all(df["resale_price"].tolist() == [300000] for df in fetched.values())
+    assert fake_api.fetches == {dataset: 1 for dataset in DATASETS}
+
+
+def test_fetches_concurrently(fake_api):
+    # Each download takes `delay`, so fetching in turn would take five times it
+    fake_api.delay = 0.5
+    started = time.perf_counter()
+    fetched = fetch_datasets(DATASETS, api_url=fake_api.url)
+    assert time.perf_counter() - started < 2 * fake_api.delay
+    assert list(fetched) == DATASETS
+
+
+def test_skips_datasets_already_fetched(fake_api):
+    fetched = fetch_datasets(DATASETS[:2], api_url=fake_api.url)
+    previous = fetched[DATASETS[0]]
+    assert fetch_datasets(DATASETS, fetched, api_url=fake_api.url) is fetched
+    assert fetched[DATASETS[0]] is previous
+    assert fake_api.fetches == {dataset: 1 for dataset in DATASETS}
+    requests = fake_api.requests
+    fetch_datasets(DATASETS, fetched, api_url=fake_api.url)
+    assert fake_api.requests == requests
+
+
+def test_resumes_after_failures(fake_api):
+    fake_api.failing = {DATASETS[1], DATASETS[3]}
+    fetched = {}
+    with pytest.raises(IngestError) as raised:
+        fetch_datasets(DATASETS, fetched, api_url=fake_api.url)
+    assert set(raised.value.errors) == {DATASETS[1], DATASETS[3]}
+    assert all("500" in str(error) for error in raised.value.errors.values())
+    assert DATASETS[1] in str(raised.value)
+    assert set(fetched) == {DATASETS[0], DATASETS[2], DATASETS[4]}
+
+    # Retrying with the same dict only fetches the datasets that failed
+    fake_api.failing = set()
+    fetch_datasets(DATASETS, fetched, api_url=fake_api.url)
+    assert set(fetched) == set(DATASETS)
+    assert fake_api.fetches == {
+        dataset: 2 if dataset in (DATASETS[1], DATASETS[3]) else 1
+        for dataset in DATASETS
+    }
+
+
+def test_download_raises_on_any_failure(fake_api):
+    fake_api.failing = {DATASETS[0]}
+    with pytest.raises(IngestError) as raised:
+        download_datasets(DATASETS, api_url=fake_api.url)
+    assert list(raised.value.errors) == [DATASETS[0]]
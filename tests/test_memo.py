@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+
+from resale.ingest import DATASETS
+from resale.memo import LRUCache, nbytes
+from resale.store import dataset_version, write_meta
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    def compute(self, value=None):
+        def compute():
+            self.calls += 1
+            return value
+
+        return compute
+
+
+def filter_key(version: tuple, flat_types: list, towns: list):
+    # Built the way the map page chains its filter keys
+    return (version, tuple(sorted(flat_types)), tuple(sorted(towns)))
+
+
+def test_hits_and_misses():
+    cache = LRUCache(4)
+    counter = Counter()
+    assert cache.get_or_compute("a", counter.compute(1)) == 1
+    assert cache.get_or_compute("a", counter.compute(2)) == 1
+    assert counter.calls == 1
+    assert cache.stats() == {
+        "entries": 1,
+        "bytes": 0,
+        "hits": 1,
+        "misses": 1,
+        "evictions": 0,
+    }
+
+
+def test_version_and_filter_changes_miss(tmp_path):
+    datasets = DATASETS[:2]
+    write_meta(
+        tmp_path,
+        {dataset: {"fetched_at": "2026-01-01T00:00:00"} for dataset in datasets},
+    )
+    version = dataset_version(datasets, tmp_path)
+    cache = LRUCache(8)
+    counter = Counter()
+
+    key = filter_key(version, ["4 ROOM", "3 ROOM"], ["BEDOK"])
+    cache.get_or_compute(key, counter.compute())
+    # The same selection in another order is the same key
+    cache.get_or_compute(
+        filter_key(version, ["3 ROOM", "4 ROOM"], ["BEDOK"]), counter.compute()
+    )
+    assert counter.calls == 1
+
+    cache.get_or_compute(filter_key(version, ["4 ROOM"], ["BEDOK"]), counter.compute())
+    cache.get_or_compute(
+        filter_key(version, ["3 ROOM", "4 ROOM"], ["BEDOK", "BISHAN"]),
+        counter.compute(),
+    )
+    assert counter.calls == 3
+
+    # A refetched dataset bumps the version, so the old entries are not reused
+    write_meta(
+        tmp_path,
+        {
+            datasets[0]: {"fetched_at": "2026-01-01T00:00:00"},
+            datasets[1]: {"fetched_at": "2026-01-02T00:00:00"},
+        },
+    )
+    new_version = dataset_version(datasets, tmp_path)
+    assert new_version != version
+    cache.get_or_compute(
+        filter_key(new_version, ["3 ROOM", "4 ROOM"], ["BEDOK"]), counter.compute()
+    )
+    assert counter.calls == 4
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 4
+
+
+def test_evicts_least_recently_used_entry():
+    cache = LRUCache(2)
+    counter = Counter()
+    cache.get_or_compute("a", counter.compute())
+    cache.get_or_compute("b", counter.compute())
+    cache.get_or_compute("a", counter.compute())  # "b" is now the oldest
+    cache.get_or_compute("c", counter.compute())
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert len(cache) == 2
+    assert cache.stats()["evictions"] == 1
+
+
+def test_evicts_by_bytes():
+    cache = LRUCache(10, maxbytes=2500)
+    for key in "abc":
+        cache.get_or_compute(key, lambda: np.zeros(100))  # 800 bytes each
+    assert cache.stats()["bytes"] == 2400
+    cache.get_or_compute("d", lambda: np.zeros(200))
+    assert "a" not in cache and "b" not in cache
+    assert cache.stats() == {
+        "entries": 2,
+        "bytes": 2400,
+        "hits": 0,
+        "misses": 4,
+        "evictions": 2,
+    }
+
+
+def test_oversized_value_is_not_kept():
+    cache = LRUCache(10, maxbytes=1000)
+    cache.get_or_compute("small", lambda: np.zeros(10))
+    value = cache.get_or_compute("big", lambda: np.zeros(1000))
+    assert len(value) == 1000
+    assert "big" not in cache and "small" in cache
+    assert cache.stats()["evictions"] == 0
+
+
+def test_clear_resets_entries_and_bytes():
+    cache = LRUCache(10, maxbytes=10_000)
+    cache.get_or_compute("a", lambda: np.zeros(10))
+    cache.clear()
+    assert len(cache) == 0 and cache.stats()["bytes"] == 0
+    cache.get_or_compute("a", lambda: np.zeros(20))
+    assert cache.stats()["bytes"] == 160
+
+
+def test_nbytes():
+    df = pd.DataFrame({"a": np.zeros(10), "b": np.zeros(10, dtype=np.int32)})
+    assert nbytes(df) == df.memory_usage(index=True).sum()
+    assert nbytes(np.zeros(10)) == 80
+    assert nbytes((np.zeros(10), np.zeros(5))) == 120
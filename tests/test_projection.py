@@ -0,0 +1,161 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+from dateutil.relativedelta import relativedelta
+
+from resale.projection import COLUMNS, project_savings
+
+
+def reference_cpf_oa_increase(salary, year, age):
+    # The per-call rules calc_cpf_oa_increase had before the lookup tables
+    cap = 7400 if year == 2025 else 8000
+    if age <= 35:
+        portion_to_oa = 0.6217
+    elif age <= 45:
+        portion_to_oa = 0.5677
+    elif age <= 50:
+        portion_to_oa = 0.5136
+    elif age <= 55:
+        portion_to_oa = 0.4055
+    elif age <= 60:
+        portion_to_oa = 0.3694
+    elif age <= 65:
+        portion_to_oa = 0.149
+    elif age <= 70:
+        portion_to_oa = 0.0607
+    else:
+        portion_to_oa = 0.08
+    return min(salary, cap) * 0.37 * portion_to_oa
+
+
+def reference_projection(
+    start,
+    months,
+    age,
+    birth_month,
+    salary,
+    salary_raise,
+    raise_month,
+    bank_bal,
+    bank_bal_inc,
+    bank_base_interest,
+    bank_bonus_interest,
+    bank_bonus_interest_cap,
+    cpf_bal,
+):
+    # The month-by-month loop "Your Projection" used to run in main.py
+    next_row = {
+        "Salary": salary,
+        "Bank Increase": bank_bal_inc,
+        "Bank Interest": 0,
+        "Bank Balance": bank_bal,
+        "CPF(OA) Increase": reference_cpf_oa_increase(salary, start.year, age),
+        "CPF(OA) Interest": 0,
+        "CPF(OA) Balance": cpf_bal,
+        "Total balance": 0,
+    }
+    rows = []
+    index = []
+    next_date = start
+    pending_cpf = []
+    for _ in range(months):
+        if next_date.year > start.year and next_date.month == birth_month:
+            age += 1
+        if next_date.month == raise_month:
+            salary += salary_raise / 100 * salary
+            bank_bal_inc += salary_raise / 100 * bank_bal_inc
+            next_row["Salary"] = salary
+            next_row["Bank Increase"] = bank_bal_inc
+        next_row["Bank Interest"] = (
+            next_row["Bank Balance"] * bank_base_interest / 12 / 100
+            + min(next_row["Bank Balance"], bank_bonus_interest_cap)
+            * bank_bonus_interest
+            / 12
+            / 100
+        )
+        next_row["Bank Balance"] = (
+            next_row["Bank Balance"] + next_row["Bank Interest"] + bank_bal_inc
+        )
+        next_row["CPF(OA) Increase"] = reference_cpf_oa_increase(
+            salary, next_date.year, age
+        )
+        if next_date.month == 1:
+            for interest in pending_cpf:
+                next_row["CPF(OA) Balance"] += interest
+            pending_cpf = []
+        next_row["CPF(OA) Interest"] = next_row["CPF(OA) Balance"] * 2.5 / 12 / 100
+        pending_cpf.append(next_row["CPF(OA) Interest"])
+        next_row["CPF(OA) Balance"] += next_row["CPF(OA) Increase"]
+        next_row["Total balance"] = (
+            next_row["Bank Balance"] + next_row["CPF(OA) Balance"]
+        )
+        rows.append(dict(next_row))
+        index.append(next_date.strftime("%Y-%m"))
+        next_date += relativedelta(months=1)
+    proj_df = pd.DataFrame(rows, index=index, columns=COLUMNS, dtype=float)
+    proj_df.index.name = "Year/Month"
+    return proj_df
+
+
+def assert_matches_reference(*args):
+    expected = reference_projection(*args)
+    actual = project_savings(*args)
+    pd.testing.assert_frame_equal(actual, expected, check_exact=False, rtol=1e-9)
+
+
+@pytest.mark.parametrize(
+    "salary",
+    [3000, 7400, 7800, 8000, 12000],
+    ids=["below", "2025-ceiling", "between", "2026-ceiling", "above"],
+)
+def test_matches_reference_across_wage_ceilings(salary):
+    # Starts in 2025 so both the 7400 and 8000 ceilings are crossed
+    assert_matches_reference(
+        date(2025, 3, 1), 36, 30, 7, salary, 3, 4, 20000, 1500, 0.05, 2, 75000, 40000
+    )
+
+
+@pytest.mark.parametrize("age", [20, 35, 36, 45, 50, 55, 60, 65, 70, 71, 80])
+def test_matches_reference_across_age_bands(age):
+    # Three birthdays move each starting age across its band limit
+    assert_matches_reference(
+        date(2026, 1, 1), 40, age, 6, 5500, 2, 1, 10000, 800, 0.05, 1.5, 50000, 25000
+    )
+
+
+def test_matches_reference_before_2025():
+    # Years before the first table row use the 2025 allocations and the
+    # 8000 ceiling, as the old else-branch did
+    assert_matches_reference(
+        date(2021, 11, 1), 60, 33, 2, 7700, 4, 3, 5000, 1200, 0.1, 3, 100000, 15000
+    )
+
+
+def test_matches_reference_on_random_scenarios():
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        assert_matches_reference(
+            date(int(rng.integers(2020, 2030)), int(rng.integers(1, 13)), 1),
+            int(rng.integers(0, 480)),
+            int(rng.integers(18, 75)),
+            int(rng.integers(1, 13)),
+            float(rng.uniform(1000, 15000)),
+            float(rng.uniform(0, 8)),
+            int(rng.integers(1, 13)),
+            float(rng.uniform(0, 200000)),
+            float(rng.uniform(0, 5000)),
+            float(rng.uniform(0, 1)),
+            float(rng.uniform(0, 4)),
+            float(rng.uniform(0, 100000)),
+            float(rng.uniform(0, 200000)),
+        )
+
+
+def test_empty_projection():
+    proj_df = project_savings(
+        date(2025, 1, 1), 0, 30, 1, 5000, 3, 1, 1000, 100, 0.05, 0, 0, 1000
+    )
+    assert proj_df.empty
+    assert list(proj_df.columns) == COLUMNS
@@ -0,0 +1,132 @@
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+
+from resale.ingest import LATEST_DATASET, IngestError
+from resale.refresh import Refresher
+from resale.store import dataset_version, load_resale_dataset
+
+
+def wait_until(condition, timeout: float = 10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def refresher(tmp_path, fake_api):
+    def load():
+        return load_resale_dataset(
+            [LATEST_DATASET],
+            tmp_path,
+            refresh_after=timedelta(0),
+            api_url=fake_api.url,
+        )
+
+    refresher = Refresher(load, interval=timedelta(seconds=0.2), name="test")
+    yield refresher.start()
+    refresher.stop()
+
+
+def test_refresh_swaps_in_new_data(refresher, fake_api, tmp_path):
+    assert refresher.result(10)["resale_price"].tolist() == [300000]
+    version = dataset_version([LATEST_DATASET], tmp_path)
+
+    # Reads keep returning the current copy while a slow reload runs
+    fake_api.price = 310000
+    fake_api.delay = 1
+    slowest = 0
+    deadline = time.monotonic() + 10
+    while refresher.result()["resale_price"].tolist() != [310000]:
+        assert time.monotonic() < deadline, "timed out"
+        start = time.perf_counter()
+        refresher.result()
+        slowest = max(slowest, time.perf_counter() - start)
+        time.sleep(0.01)
+    assert slowest < 0.1
+    assert dataset_version([LATEST_DATASET], tmp_path) != version
+
+
+def test_failed_refresh_serves_previous_copy(refresher, fake_api):
+    assert refresher.result(10)["resale_price"].tolist() == [300000]
+    fake_api.fail = True
+    fake_api.price = 0
+    requests = fake_api.requests
+    wait_until(lambda: fake_api.requests >= requests + 2)
+    assert refresher.result()["resale_price"].tolist() == [300000]
+
+
+def test_failed_first_load_raises_then_retries(tmp_path, fake_api):
+    fake_api.fail = True
+
+    def load():
+        return load_resale_dataset([LATEST_DATASET], tmp_path, api_url=fake_api.url)
+
+    refresher = Refresher(load, retry_after=timedelta(minutes=1)).start()
+    try:
+        with pytest.raises(IngestError):
+            refresher.result(10)
+        # result() asked for a retry rather than waiting for retry_after
+        fake_api.fail = False
+        assert refresher.result(10)["resale_price"].tolist() == [300000]
+        assert refresher.version == 1
+    finally:
+        refresher.stop()
+
+
+def test_result_times_out_before_first_load():
+    loaded = threading.Event()
+    refresher = Refresher(loaded.wait, interval=None).start()
+    try:
+        with pytest.raises(TimeoutError):
+            refresher.result(0.05)
+        loaded.set()
+        assert refresher.result(10) is True
+    finally:
+        refresher.stop()
+
+
+@pytest.mark.parametrize("attempt", range(20))
+def test_readers_racing_a_failed_first_load(attempt):
+    # The first load fails and the retry a reader triggers succeeds; every
+    # reader sees the failure or the value, never a mix of the two
+    calls = []
+
+    def load():
+        calls.append(None)
+        if len(calls) == 1:
+            raise ValueError("first load failed")
+        return "loaded"
+
+    refresher = Refresher(load, retry_after=timedelta(minutes=1)).start()
+    outcomes = []
+
+    def read():
+        try:
+            outcomes.append(refresher.result(10))
+        except ValueError as e:
+            outcomes.append(e)
+
+    try:
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        for reader in readers:
+            reader.join()
+        assert len(outcomes) == 4
+        assert all(
+            outcome == "loaded" or isinstance(outcome, ValueError)
+            for outcome in outcomes
+        )
+        # Once the retry has succeeded, reads return straight away
+        assert refresher.result(10) == "loaded"
+        start = time.perf_counter()
+        assert refresher.result(0) == "loaded"
+        assert time.perf_counter() - start < 0.1
+        assert refresher.error is None
+        assert len(calls) == 2
+    finally:
+        refresher.stop()
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import synthetic_transactions
+from resale.cube import CUBE_KEYS, build_price_cube
+from resale.schema import normalise
+from resale.sketch import (
+    QUANTILES,
+    RELATIVE_ACCURACY,
+    SKETCH_KEYS,
+    build_sketches,
+    merge_sketches,
+    sketch_quantiles,
+)
+
+
+def exact_quantiles(df: pd.DataFrame, keys: list):
+    # The price of rank floor(q * (n - 1)), which the sketch bound refers to
+    cells = df.groupby(keys, observed=True)["resale_price"]
+    return pd.DataFrame(
+        {
+            f"p{round(q * 100)}": cells.quantile(q, interpolation="lower")
+            for q in QUANTILES
+        }
+    )
+
+
+def assert_within_accuracy(estimated: pd.DataFrame, exact: pd.DataFrame):
+    estimated, exact = estimated.align(exact, join="outer")
+    assert not estimated.isna().any().any()
+    assert not exact.isna().any().any()
+    error = (estimated - exact).abs() / exact
+    assert (error.to_numpy() <= RELATIVE_ACCURACY * (1 + 1e-9)).all(), error.max()
+
+
+@pytest.fixture(scope="module")
+def transactions():
+    # Unrounded prices so the estimates land anywhere within their bins
+    df = normalise(synthetic_transactions(20_000, "2014-01", "2017-12", seed=1))
+    rng = np.random.default_rng(2)
+    df["resale_price"] = df["resale_price"] * rng.uniform(0.9, 1.1, len(df))
+    return df
+
+
+def test_monthly_sketch_quantiles(transactions):
+    sketch_df = build_sketches(transactions)
+    assert_within_accuracy(
+        sketch_quantiles(sketch_df, SKETCH_KEYS),
+        exact_quantiles(transactions, SKETCH_KEYS),
+    )
+
+
+def test_merged_partial_sketches(transactions):
+    # Partitions split mid-year, as the datasets in the store are, so cells
+    # get their counts from more than one partial sketch
+    bounds = [pd.Period("2014-07", "M"), pd.Period("2015-01", "M")]
+    bounds += [pd.Period("2016-10", "M")]
+    parts = np.searchsorted(bounds, transactions["month"], side="right")
+    partials = [
+        build_sketches(transactions[parts == part]) for part in np.unique(parts)
+    ]
+    merged = merge_sketches(partials)
+    assert_within_accuracy(
+        sketch_quantiles(merged, SKETCH_KEYS),
+        exact_quantiles(transactions, SKETCH_KEYS),
+    )
+
+    # Rolled up into years, the way the price cube reads them
+    yearly = merged.assign(year=merged["month"].dt.year).drop(columns="month")
+    yearly = merge_sketches([yearly], CUBE_KEYS)
+    with_year = transactions.assign(year=transactions["month"].dt.year)
+    assert_within_accuracy(
+        sketch_quantiles(yearly, CUBE_KEYS), exact_quantiles(with_year, CUBE_KEYS)
+    )
+
+
+def test_price_cube_quantiles(transactions):
+    cells = build_price_cube(transactions).cells
+    columns = [f"p{round(q * 100)}" for q in QUANTILES]
+    exact = exact_quantiles(
+        transactions.assign(
+            year=transactions["month"].dt.year,
+            town=transactions["town"].astype(str),
+            flat_type=transactions["flat_type"].astype(str),
+        ),
+        CUBE_KEYS,
+    )
+    assert_within_accuracy(cells[columns], exact)
+
+
+def test_single_price_cell():
+    df = pd.DataFrame(
+        {
+            "month": pd.PeriodIndex(["2020-01"], freq="M"),
+            "town": ["BEDOK"],
+            "flat_type": ["4 ROOM"],
+            "resale_price": [432100.0],
+        }
+    )
+    estimated = sketch_quantiles(build_sketches(df), SKETCH_KEYS)
+    assert_within_accuracy(estimated, exact_quantiles(df, SKETCH_KEYS))
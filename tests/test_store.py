@@ -0,0 +1,140 @@
+import threading
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+import resale.store
+from benchmarks.synthetic import synthetic_transactions
+from resale.ingest import DATASETS
+from resale.schema import normalise
+from resale.store import (
+    dataset_version,
+    load_resale_dataset,
+    partition_path,
+    read_meta,
+    read_partition,
+    select_frame,
+    write_frame,
+)
+
+COLUMNS = ["town", "resale_price"]
+MONTH_RANGES = [
+    (None, None),
+    (pd.Period("2016-03", "M"), None),
+    (None, pd.Period("2015-08", "M")),
+    (pd.Period("2015-05", "M"), pd.Period("2016-02", "M")),
+    (pd.Period("2015-07", "M"), pd.Period("2015-07", "M")),
+]
+
+
+@pytest.fixture
+def partition(tmp_path, monkeypatch):
+    # Small row groups so month ranges skip some of them by their statistics
+    monkeypatch.setattr(resale.store, "ROW_GROUP_ROWS", 500)
+    df = normalise(synthetic_transactions(5000, "2015-01", "2016-12", seed=4))
+    path = partition_path(tmp_path, DATASETS[0])
+    write_frame(path, df)
+    assert pq.ParquetFile(path).num_row_groups == 10
+    return path, df
+
+
+def assert_same_rows(actual: pd.DataFrame, expected: pd.DataFrame):
+    pd.testing.assert_frame_equal(
+        actual.reset_index(drop=True), expected.reset_index(drop=True)
+    )
+
+
+@pytest.mark.parametrize("months", MONTH_RANGES)
+@pytest.mark.parametrize("columns", [None, COLUMNS, ["month", "resale_price"]])
+def test_read_partition_matches_select_frame(partition, columns, months):
+    path, df = partition
+    expected = select_frame(df, columns, None if months == (None, None) else months)
+    start, end = months
+    keep = df["month"].between(start or df["month"].min(), end or df["month"].max())
+    assert len(expected) == keep.sum()
+    assert list(expected.columns) == list(df.columns if columns is None else columns)
+    assert_same_rows(read_partition(path, columns, months), expected)
+
+
+def test_read_partition_outside_partition(partition):
+    path, df = partition
+    months = (pd.Period("2020-03", "M"), None)
+    result = read_partition(path, COLUMNS, months)
+    assert result.empty
+    assert list(result.columns) == COLUMNS
+    assert select_frame(df, COLUMNS, months).empty
+
+
+def test_load_with_partition_filtered_out(tmp_path, fake_api):
+    # Datasets whose months all fall outside the range still concatenate
+    fake_api.months = ["2015-01", "2015-02"]
+    load_resale_dataset(DATASETS[:1], tmp_path, api_url=fake_api.url)
+    fake_api.months = ["2020-02", "2020-03", "2020-04"]
+    load_resale_dataset(DATASETS[1:2], tmp_path, api_url=fake_api.url)
+    df = load_resale_dataset(
+        DATASETS[:2],
+        tmp_path,
+        api_url=fake_api.url,
+        columns=COLUMNS,
+        months=(pd.Period("2020-03", "M"), None),
+    )
+    assert len(df) == 2
+    assert list(df.columns) == COLUMNS
+    assert isinstance(df["town"].dtype, pd.CategoricalDtype)
+    assert df["town"].tolist() == ["BEDOK", "BEDOK"]
+
+
+@pytest.mark.parametrize("months", MONTH_RANGES[1:])
+def test_fetched_and_stored_reads_match(tmp_path, fake_api, months):
+    fake_api.months = pd.period_range("2015-01", "2016-12", freq="M").astype(str)
+    requests = fake_api.requests
+    fetched = load_resale_dataset(
+        DATASETS[:2], tmp_path, api_url=fake_api.url, columns=COLUMNS, months=months
+    )
+    stored = load_resale_dataset(
+        DATASETS[:2], tmp_path, api_url=fake_api.url, columns=COLUMNS, months=months
+    )
+    assert fake_api.requests == requests + 2
+    assert len(fetched) > 0
+    pd.testing.assert_frame_equal(fetched, stored)
+
+
+def test_loads_and_stores_datasets(tmp_path, fake_api):
+    df = load_resale_dataset(DATASETS[:2], tmp_path, api_url=fake_api.url)
+    assert df["resale_price"].tolist() == [300000, 300000]
+    assert set(read_meta(tmp_path)) == set(DATASETS[:2])
+    assert None not in dataset_version(DATASETS[:2], tmp_path)
+
+    # Stored partitions are read back without fetching again
+    requests = fake_api.requests
+    load_resale_dataset(DATASETS[:2], tmp_path, api_url=fake_api.url)
+    assert fake_api.requests == requests
+
+
+def test_concurrent_loads_keep_each_others_meta(tmp_path, fake_api):
+    # Both loads read the empty meta before either fetch completes
+    fake_api.delay = 0.5
+    threads = [
+        threading.Thread(
+            target=load_resale_dataset,
+            args=([dataset], tmp_path),
+            kwargs={"api_url": fake_api.url},
+        )
+        for dataset in DATASETS[:2]
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert set(read_meta(tmp_path)) == set(DATASETS[:2])
+    assert not [p for p in tmp_path.iterdir() if p.name.endswith(".tmp")]
+
+
+def test_failed_write_keeps_previous_file(tmp_path):
+    path = partition_path(tmp_path, DATASETS[0])
+    write_frame(path, pd.DataFrame({"resale_price": [1.0]}))
+    with pytest.raises(ValueError):
+        write_frame(path, pd.DataFrame({"resale_price": [object()]}))
+    assert pd.read_parquet(path)["resale_price"].tolist() == [1.0]
+    assert [p.name for p in tmp_path.iterdir()] == [path.name]
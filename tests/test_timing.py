@@ -0,0 +1,60 @@
+import threading
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from resale.timing import BACKGROUND_RECORDS, Timings, background_timings
+
+
+def test_stage_stops_tracing_after_an_error():
+    timings = Timings(True)
+    with pytest.raises(ValueError), timings.stage("outer"), timings.stage("inner"):
+        raise ValueError
+    assert not tracemalloc.is_tracing()
+    assert [(r["stage"], r["depth"]) for r in timings.to_records()] == [
+        ("inner", 1),
+        ("outer", 0),
+    ]
+
+
+def test_timed_counts_rows():
+    timings = Timings(True, trace_memory=False)
+    timings.timed(lambda values: values[values > 0])(np.arange(-5, 5))
+    (record,) = timings.to_records()
+    assert (record["rows_in"], record["rows_out"]) == (10, 4)
+    assert record["process_peak_mb"] is None
+
+
+def test_disabled_records_nothing():
+    timings = Timings(False)
+    assert timings.timed(lambda: 1)() == 1
+    assert timings.to_records() == []
+
+
+def test_background_timings_collect_from_other_threads():
+    timings = background_timings()
+
+    @timings.timed
+    def load():
+        assert not tracemalloc.is_tracing()
+        return np.zeros(3)
+
+    threads = [threading.Thread(target=load, name=f"loader-{i}") for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    records = timings.to_records()
+    assert sorted(r["thread"] for r in records) == [f"loader-{i}" for i in range(4)]
+    assert all(r["rows_out"] == 3 for r in records)
+
+
+def test_background_timings_keep_latest_records():
+    timings = background_timings()
+    for i in range(BACKGROUND_RECORDS + 5):
+        with timings.stage(f"load-{i}"):
+            pass
+    records = timings.to_records()
+    assert len(records) == BACKGROUND_RECORDS
+    assert records[-1]["stage"] == f"load-{BACKGROUND_RECORDS + 4}"